@@ -1,66 +1,465 @@
-"""PyInstaller를 이용해 Windows/Mac 실행 파일을 생성하는 스크립트."""
+"""PyInstaller를 이용해 Windows/Mac/Linux 실행 파일을 생성하는 스크립트."""
 
 from __future__ import annotations
 
+# `--help`나 최신 상태 검사처럼 짧게 끝나는 실행이 빠르도록, 무거운 모듈은 실제로 쓰는 함수 안에서 불러온다.
 import argparse
-import shutil
-import subprocess
+import os
+import sys
 from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).parent
+PROJECT_ROOT = Path(__file__).resolve().parent
 ENTRY_FILE = PROJECT_ROOT / "inventory_app.py"
 THEME_FILE = PROJECT_ROOT / "theme.json"
+BUILD_REQUIREMENTS = PROJECT_ROOT / "requirements-build.txt"
+PIP_CACHE_DIR = PROJECT_ROOT / ".pip-cache"
+CCACHE_DIR = PROJECT_ROOT / ".ccache"
+FINGERPRINT_NAME = ".build_fingerprint"
+MTIME_NAME = ".build_mtime"
+# 실행 파일에 함께 묶을 데이터 파일: (원본 경로, 번들 안의 대상 폴더)
+DATA_FILES: tuple[tuple[Path, str], ...] = ((THEME_FILE, "."),)
+DECLARED_INPUTS = (
+    *(src for src, _ in DATA_FILES),
+    PROJECT_ROOT / "requirements.txt",
+    BUILD_REQUIREMENTS,
+    PROJECT_ROOT / Path(__file__).name,
+)
+TARGETS = ("windows", "mac", "linux")
+# 앱이 쓰지 않는 표준/개발용 모듈. tkinter는 UI가 사용하므로 제외 대상에 넣지 않는다.
+EXCLUDES = ("unittest", "test", "pydoc", "pydoc_data", "lib2to3", "distutils", "setuptools")
+OPTIMIZE_LEVEL = 2
+
+
+def _bootloader_build_env() -> dict[str, str]:
+    """부트로더를 소스에서 컴파일하는 설치라면 ccache로 C 컴파일 결과를 재사용한다.
+
+    PYINSTALLER_COMPILE_BOOTLOADER가 설정된 경우에만 부트로더를 직접 빌드하므로,
+    미리 빌드된 부트로더를 쓰는 일반 설치에는 아무 변수도 추가하지 않는다.
+    """
+
+    import shutil
+
+    env = os.environ.copy()
+    if env.get("PYINSTALLER_COMPILE_BOOTLOADER") and shutil.which("ccache"):
+        env["CC"] = "ccache gcc"
+        env["CXX"] = "ccache g++"
+        env["CCACHE_DIR"] = str(CCACHE_DIR)
+    return env
 
 
 def ensure_pyinstaller() -> None:
-    """PyInstaller 설치 여부를 검사한다."""
+    """PyInstaller 설치 여부를 검사하고, 없으면 requirements-build.txt로 설치한다.
+
+    내려받은 wheel은 `.pip-cache/`에 보관되므로 CI에서는 이 폴더를 캐시하면 된다.
+    (GitHub Actions 예: `key: pip-${{ hashFiles('requirements-build.txt') }}`, `path: .pip-cache`)
+    """
 
-    if shutil.which("pyinstaller") is None:
+    import importlib.util
+    import subprocess
+
+    if importlib.util.find_spec("PyInstaller") is not None:
+        return
+    if not BUILD_REQUIREMENTS.exists():
         raise SystemExit("PyInstaller가 설치되어 있지 않습니다. 'pip install pyinstaller' 명령으로 설치하세요.")
+    print("PyInstaller가 없어 requirements-build.txt로 설치합니다.")
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--cache-dir",
+            str(PIP_CACHE_DIR),
+            "-r",
+            str(BUILD_REQUIREMENTS),
+        ],
+        check=True,
+        env=_bootloader_build_env(),
+    )
+    importlib.invalidate_caches()
+    if importlib.util.find_spec("PyInstaller") is None:
+        raise SystemExit("PyInstaller 설치에 실패했습니다. 'pip install -r requirements-build.txt'를 직접 실행해 보세요.")
+
+
+def _app_name(target: str) -> str:
+    return "MOWInventoryMac" if target == "mac" else "MOWInventory"
+
+
+def _host_target() -> str:
+    """현재 OS에 해당하는 빌드 대상. PyInstaller는 교차 빌드를 하지 못하므로 이 대상만 만들 수 있다."""
+
+    if sys.platform.startswith("win"):
+        return "windows"
+    if sys.platform == "darwin":
+        return "mac"
+    return "linux"
+
+
+def _output_path(target: str, dist_dir: Path) -> Path:
+    """PyInstaller가 만들어 낼 최종 산출물 경로를 돌려준다."""
+
+    name = _app_name(target)
+    if target == "windows":
+        return dist_dir / f"{name}.exe"
+    if target == "mac":
+        return dist_dir / f"{name}.app"
+    return dist_dir / name
+
+
+def _pyinstaller_version() -> tuple[int, ...]:
+    import importlib.metadata
+
+    version = importlib.metadata.version("pyinstaller")
+    return tuple(int(part) for part in version.split(".")[:2] if part.isdigit())
+
+
+def _supports_spec_optimize() -> bool:
+    """PyInstaller 6.6부터 spec의 Analysis(optimize=...)로 바이트코드 최적화 수준을 지정할 수 있다."""
+
+    return _pyinstaller_version() >= (6, 6)
+
+
+def _collect_sources() -> list[Path]:
+    """엔트리 파일이 import하는 프로젝트 내부 모듈과 선언된 입력 파일을 모은다.
+
+    site-packages 등 프로젝트 밖의 모듈은 fingerprint의 Python/PyInstaller 버전으로 대신 추적한다.
+    """
+
+    import ast
+
+    sources: list[Path] = []
+    pending = [ENTRY_FILE]
+    seen: set[Path] = set()
+    while pending:
+        path = pending.pop()
+        if path in seen or not path.is_file():
+            continue
+        seen.add(path)
+        sources.append(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                module_path = PROJECT_ROOT.joinpath(*module.split("."))
+                pending.extend([module_path.with_suffix(".py"), module_path / "__init__.py"])
+    sources.extend(path for path in DECLARED_INPUTS if path.is_file())
+    return sources
+
+
+def _toolchain_key() -> str:
+    """빌드 결과를 바꾸는 도구 버전(Python·PyInstaller). 수정 시각 검사와 내용 해시 모두에 넣는다."""
+
+    import importlib.metadata
+
+    try:
+        pyinstaller = importlib.metadata.version("pyinstaller")
+    except importlib.metadata.PackageNotFoundError:
+        # 설치 전에 캐시 키만 뽑는 경우. 버전은 해시에 들어가는 requirements-build.txt가 대신 고정한다.
+        pyinstaller = "not-installed"
+    return f"{sys.version} pyinstaller={pyinstaller}"
+
+
+def _build_options(
+    target: str, onefile: bool, release: bool, keep_modules: tuple[str, ...]
+) -> tuple[bool, list[str], str]:
+    """실제로 쓸 onefile 여부·제외 모듈과, 이를 요약한 옵션 키를 돌려준다."""
+
+    # Windows·Linux는 항상 단일 실행 파일로 만든다(산출물 경로가 하나로 정해진다).
+    onefile = onefile or target != "mac"
+    excludes = [module for module in EXCLUDES if module not in keep_modules]
+    options_key = f"{target}:onefile={onefile}:release={release}:excludes={','.join(excludes)}"
+    return onefile, excludes, options_key
+
+
+def _inputs_fingerprint(options_key: str) -> str:
+    """빌드 결과에 영향을 주는 입력값을 SHA-256으로 요약한다."""
+
+    import hashlib
+
+    digest = hashlib.sha256()
+    for path in _collect_sources():
+        digest.update(path.read_bytes())
+    digest.update(_toolchain_key().encode())
+    digest.update(options_key.encode())
+    return digest.hexdigest()
+
+
+def cache_key(target: str, onefile: bool = False, release: bool = False, keep_modules: tuple[str, ...] = ()) -> str:
+    """CI 캐시(`build/`, `dist/`)의 키로 쓸 입력 해시를 만든다.
+
+    빌드 최신 여부 검사와 같은 fingerprint(소스·Python/PyInstaller 버전·빌드 옵션)에 OS 이름을 더한다.
+    빌드와 같은 옵션으로 호출해야 한다(예: `--target linux --release --print-cache-key`).
+
+    GitHub Actions 예:
+        - id: keygen
+          run: echo "key=$(python build_desktop.py --print-cache-key)" >> "$GITHUB_OUTPUT"
+        - uses: actions/cache@v4
+          with:
+            path: |
+              build/
+              dist/
+            key: pyi-${{ runner.os }}-${{ steps.keygen.outputs.key }}
+    """
 
+    import hashlib
+    import platform
 
-def build(target: str, onefile: bool = False) -> None:
-    """선택한 OS용 실행 파일을 생성한다."""
+    _, _, options_key = _build_options(target, onefile, release, keep_modules)
+    digest = hashlib.sha256()
+    digest.update(platform.system().encode())
+    digest.update(_inputs_fingerprint(options_key).encode())
+    return digest.hexdigest()
+
+
+def _render_spec(target: str, onefile: bool, release: bool, excludes: list[str]) -> str:
+    """PyInstaller spec 파일 내용을 결정적으로 생성한다.
+
+    UPX 압축은 시간이 오래 걸리므로 배포용(`release=True`) 빌드에서만 켠다.
+    Analysis 결과는 PyInstaller가 `build/<target>/Analysis-00.toc`에 저장하고, 스크립트·모듈 수정 시각과
+    Analysis 인자가 그대로면 import 분석을 다시 하지 않고 불러온다. 이 캐시가 깨지지 않도록 Analysis 인자는
+    항상 같은 순서·값으로 출력한다.
+    """
+
+    name = _app_name(target)
+    upx = release
+    datas = [(str(src), dst) for src, dst in DATA_FILES if src.is_file()]
+    optimize = f", optimize={OPTIMIZE_LEVEL}" if _supports_spec_optimize() else ""
+    lines = [
+        "# build_desktop.py가 자동 생성한 파일입니다. 직접 수정하지 마세요.",
+        f"a = Analysis([{str(ENTRY_FILE)!r}], pathex=[], binaries=[], datas={datas!r}, hiddenimports=[], "
+        f"excludes={excludes!r}{optimize})",
+        "pyz = PYZ(a.pure)",
+    ]
+    if onefile:
+        lines.append(f"exe = EXE(pyz, a.scripts, a.binaries, a.datas, [], name={name!r}, upx={upx}, console=False)")
+        bundle_source = "exe"
+    else:
+        lines.append(f"exe = EXE(pyz, a.scripts, [], exclude_binaries=True, name={name!r}, upx={upx}, console=False)")
+        lines.append(f"coll = COLLECT(exe, a.binaries, a.datas, name={name!r}, upx={upx})")
+        bundle_source = "coll"
+    if target == "mac":
+        lines.append(f"app = BUNDLE({bundle_source}, name={name + '.app'!r}, bundle_identifier=None)")
+    return "\n".join(lines) + "\n"
+
+
+def _ensure_spec(target: str, onefile: bool, release: bool, excludes: list[str]) -> Path:
+    """spec 파일을 만들고, 내용이 같으면 그대로 두어 PyInstaller 캐시 비교가 유지되게 한다."""
+
+    spec_path = PROJECT_ROOT / "build" / f"build_{target}.spec"
+    spec_path.parent.mkdir(parents=True, exist_ok=True)
+    content = _render_spec(target, onefile, release, excludes)
+    if not spec_path.exists() or spec_path.read_text(encoding="utf-8") != content:
+        spec_path.write_text(content, encoding="utf-8")
+    return spec_path
+
+
+def _run_pyinstaller(cmd: list[str], env: dict[str, str], use_subprocess: bool) -> None:
+    """PyInstaller를 현재 프로세스에서 실행하고, 격리가 필요하면 별도 프로세스로 실행한다."""
+
+    import subprocess
+
+    if use_subprocess:
+        subprocess.run(cmd, check=True, env=env, stdout=sys.stdout, stderr=sys.stderr, text=True, bufsize=1)
+        return
+    # PyInstaller는 import 시점에 PYINSTALLER_CONFIG_DIR 등을 읽으므로 환경을 먼저 맞추고, 끝나면 원래대로 돌려놓는다.
+    saved_env = os.environ.copy()
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        import PyInstaller.__main__ as pyi_main
+
+        pyi_main.run(cmd[3:])
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            raise subprocess.CalledProcessError(exc.code if isinstance(exc.code, int) else 1, cmd) from exc
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+def _post_process(app_path: Path) -> None:
+    """macOS 앱 번들 안의 라이브러리 확장 속성을 지우고 병렬로 ad-hoc 서명한다.
+
+    파일마다 독립적인 외부 명령이므로 스레드로 동시에 실행하고, 내부 서명이 바뀐 뒤 번들 전체를 다시 서명한다.
+    """
+
+    import shutil
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+
+    if sys.platform != "darwin" or not app_path.is_dir():
+        return
+    if shutil.which("codesign") is None or shutil.which("xattr") is None:
+        return
+    libraries = [path for pattern in ("*.dylib", "*.so") for path in app_path.rglob(pattern)]
+
+    def sign(path: Path) -> None:
+        subprocess.run(["xattr", "-c", str(path)], check=True)
+        subprocess.run(["codesign", "--force", "--sign", "-", "--timestamp=none", str(path)], check=True)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        list(pool.map(sign, libraries))
+    subprocess.run(["codesign", "--force", "--sign", "-", "--timestamp=none", str(app_path)], check=True)
+
+
+def build(
+    target: str,
+    onefile: bool = False,
+    force: bool = False,
+    verbose: bool = False,
+    release: bool = False,
+    use_subprocess: bool = False,
+    keep_modules: tuple[str, ...] = (),
+    post_process: bool = True,
+) -> None:
+    """선택한 OS용 실행 파일을 생성한다.
+
+    PyInstaller 작업 폴더를 `build/<target>`에 고정해 분석·PYZ 캐시를 다음 빌드에서 재사용한다.
+    `--clean`은 일부러 사용하지 않으므로, 처음부터 다시 빌드하려면 `build/<target>` 폴더를 직접 삭제한다.
+    입력 파일이 마지막 빌드와 같으면 PyInstaller를 실행하지 않으며, `force=True`로 이를 무시할 수 있다.
+    """
+
+    import shlex
 
     ensure_pyinstaller()
     if not ENTRY_FILE.exists():
         raise SystemExit("inventory_app.py 파일을 찾을 수 없습니다.")
 
-    add_data_sep = ";" if target == "windows" else ":"
-    add_data = f"{THEME_FILE}{add_data_sep}." if THEME_FILE.exists() else None
+    onefile, excludes, options_key = _build_options(target, onefile, release, keep_modules)
+    dist_dir = PROJECT_ROOT / "dist" / target
+    output_path = _output_path(target, dist_dir)
+    before_mtime = output_path.stat().st_mtime if output_path.exists() else 0.0
+    output_exists = before_mtime > 0.0
+    # 수정 시각만 비교하는 저렴한 검사를 먼저 하고, 바뀐 파일이 있으면 내용 해시로 다시 확인한다.
+    mtime_file = dist_dir / MTIME_NAME
+    # 도구 버전도 함께 적어 두어, Python·PyInstaller를 올린 뒤에는 이 빠른 검사로 건너뛰지 않게 한다.
+    mtime_stamp = f"{max(path.stat().st_mtime for path in _collect_sources())} {options_key} {_toolchain_key()}"
+    if (
+        not force
+        and output_exists
+        and mtime_file.exists()
+        and mtime_file.read_text(encoding="utf-8").strip() == mtime_stamp
+    ):
+        print(f"{target}: 소스 변경 사항이 없습니다(no source changes).")
+        return
 
-    name = "MOWInventory" if target == "windows" else "MOWInventoryMac"
+    fingerprint_file = dist_dir / FINGERPRINT_NAME
+    fingerprint = _inputs_fingerprint(options_key)
+    if (
+        not force
+        and output_exists
+        and fingerprint_file.exists()
+        and fingerprint_file.read_text(encoding="utf-8").strip() == fingerprint
+    ):
+        print(f"{target} 빌드가 최신 상태입니다(up to date). 다시 빌드하려면 --force를 사용하세요.")
+        mtime_file.write_text(mtime_stamp, encoding="utf-8")
+        return
+
+    work_dir = PROJECT_ROOT / "build" / target
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    spec_path = _ensure_spec(target, onefile, release, excludes)
     cmd = [
-        "pyinstaller",
+        sys.executable,
+        "-m",
+        "PyInstaller",
         "--noconfirm",
-        f"--name={name}",
-        "--windowed",
+        f"--workpath={work_dir}",
+        f"--distpath={dist_dir}",
     ]
-    if onefile or target == "windows":
-        cmd.append("--onefile")
-    if add_data:
-        cmd.extend(["--add-data", add_data])
-    cmd.append(str(ENTRY_FILE))
+    if release and os.environ.get("UPX_DIR"):
+        cmd.append(f"--upx-dir={os.environ['UPX_DIR']}")
+    cmd.append(str(spec_path))
+
+    # 대상별 PyInstaller 캐시(압축/스트립된 라이브러리)를 분리해 한 작업 공간에서 여러 대상을 빌드해도 서로 덮어쓰지 않게 한다.
+    env = os.environ.copy()
+    env["PYINSTALLER_CONFIG_DIR"] = str(PROJECT_ROOT / ".pyi_cache" / target)
+    # assert/docstring을 제거한 바이트코드로 묶는다. 구버전 PyInstaller는 빌드 프로세스의 최적화 수준을 따른다.
+    if not _supports_spec_optimize():
+        env["PYTHONOPTIMIZE"] = str(OPTIMIZE_LEVEL)
+    # 값이 "0"이어도 설정만 되어 있으면 .pyc 기록이 꺼지므로 변수 자체를 제거한다.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
 
-    print("실행 명령:", " ".join(cmd))
-    subprocess.run(cmd, check=True)
-    dist_dir = PROJECT_ROOT / "dist"
-    if dist_dir.exists():
-        print(f"생성된 실행 파일은 {dist_dir.resolve()} 폴더에서 확인할 수 있습니다.")
+    if verbose:
+        print("실행 명령:", shlex.join(cmd))
+    # PYTHONOPTIMIZE는 이미 실행 중인 인터프리터에 적용할 수 없으므로 그때는 별도 프로세스를 쓴다.
+    needs_env_optimize = "PYTHONOPTIMIZE" in env and sys.flags.optimize < OPTIMIZE_LEVEL
+    _run_pyinstaller(cmd, env, use_subprocess or needs_env_optimize)
+    if post_process and target == "mac" and not onefile:
+        _post_process(output_path)
+    fingerprint_file.write_text(fingerprint, encoding="utf-8")
+    mtime_file.write_text(mtime_stamp, encoding="utf-8")
+    if output_path.exists() and output_path.stat().st_mtime > before_mtime:
+        print(f"생성된 실행 파일은 {os.fspath(dist_dir)} 폴더에서 확인할 수 있습니다.")
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="MOW 데스크톱 실행 파일 생성기")
-    parser.add_argument("--target", choices=["windows", "mac"], required=True, help="패키징할 OS")
+    parser.add_argument(
+        "--target",
+        choices=TARGETS,
+        help="패키징할 OS (현재 OS와 같은 대상만 빌드할 수 있음)",
+    )
     parser.add_argument(
         "--onefile",
         action="store_true",
         help="Mac에서도 단일 실행 파일(.app)이 아닌 하나의 바이너리로 묶고 싶을 때 사용",
     )
+    parser.add_argument("--force", action="store_true", help="입력이 바뀌지 않았어도 강제로 다시 빌드")
+    parser.add_argument("--verbose", action="store_true", help="실행하는 PyInstaller 명령을 출력")
+    parser.add_argument(
+        "--release",
+        action="store_true",
+        help="배포용 빌드: UPX 압축 사용 (UPX_DIR 환경 변수로 UPX 위치 지정 가능)",
+    )
+    parser.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="PyInstaller를 현재 프로세스가 아닌 별도 프로세스에서 실행",
+    )
+    parser.add_argument(
+        "--keep-module",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help=f"기본 제외 목록({', '.join(EXCLUDES)})에서 빼고 번들에 포함할 모듈 (여러 번 지정 가능)",
+    )
+    parser.add_argument(
+        "--no-post",
+        action="store_true",
+        help="macOS 앱 번들의 확장 속성 정리·재서명 후처리를 생략",
+    )
+    parser.add_argument("--print-cache-key", action="store_true", help="CI 캐시 키를 출력하고 종료 (빌드와 같은 --target·옵션을 함께 지정)")
     args = parser.parse_args()
 
+    if args.print_cache_key:
+        print(cache_key(args.target or _host_target(), args.onefile, args.release, tuple(args.keep_module)))
+        return
+    if args.target is None:
+        parser.error("--target 옵션이 필요합니다.")
+
+    import subprocess
+
+    # PyInstaller는 실행 중인 OS용 실행 파일만 만든다. 다른 OS 대상은 그 OS(또는 해당 CI 러너)에서 빌드해야 한다.
+    host = _host_target()
+    if args.target != host:
+        parser.error(f"'{args.target}' 대상은 현재 OS에서 빌드할 수 없습니다(가능한 대상: {host}). PyInstaller는 교차 빌드를 지원하지 않습니다.")
+
     try:
-        build(target=args.target, onefile=args.onefile)
+        build(
+            target=args.target,
+            onefile=args.onefile,
+            force=args.force,
+            verbose=args.verbose,
+            release=args.release,
+            use_subprocess=args.subprocess,
+            keep_modules=tuple(args.keep_module),
+            post_process=not args.no_post,
+        )
     except subprocess.CalledProcessError as exc:  # pragma: no cover
         raise SystemExit(exc.returncode) from exc
 
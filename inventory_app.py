@@ -2,21 +2,24 @@
 
 from __future__ import annotations
 
-import csv
 import datetime as dt
+import itertools
 import json
-import shutil
 import sqlite3
-from dataclasses import asdict, dataclass
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
 
-import pandas as pd
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 from tkinter import filedialog, messagebox, simpledialog, ttk
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 APP_DIR = Path(__file__).parent
 DATA_DIR = APP_DIR / "data"
@@ -25,6 +28,8 @@ THEME_PATH = APP_DIR / "theme.json"
 SYNC_DIR = APP_DIR / "sync"
 EXCEL_SYNC_PATH = SYNC_DIR / "mow_sync.xlsx"
 TSV_SYNC_PATH = SYNC_DIR / "mow_sync.tsv"
+# Treeview 줄무늬 태그 (짝수 행, 홀수 행)
+_ROW_TAGS = ("even", "odd")
 
 
 @dataclass
@@ -121,98 +126,352 @@ class ThemeManager:
         )
 
 
-def _dict_factory(cursor: sqlite3.Cursor, row: Tuple) -> Dict:
-    """SQLite 조회 결과를 dict로 반환한다."""
-
-    return {col[0]: value for col, value in zip(cursor.description, row)}
-
-
 class DatabaseManager:
-    """SQLite 데이터베이스에 대한 고수준 접근 레이어."""
+    """SQLite 데이터베이스에 대한 고수준 접근 레이어.
+
+    연결은 하나만 열어 두고 재사용하며, Tk 콜백·웹 요청 스레드가 동시에 쓰지 않도록 잠금으로 보호한다.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-64000",
+        "PRAGMA mmap_size=268435456",
+    )
+
+    # sqlite3 연결은 SQL 문자열을 키로 준비된 문장을 캐시한다. 자주 쓰는 문장은 상수로 고정해 재사용한다.
+    STATEMENT_CACHE_SIZE = 256
+    # 집계 결과 캐시에 남겨 둘 항목 수
+    RESULT_CACHE_SIZE = 8
+    PRODUCT_BY_CODE_SQL = "SELECT * FROM products WHERE product_code = ?"
+    INVENTORY_VALUE_SQL = "SELECT inventory_value FROM metrics WHERE id = 1"
+    CASH_BALANCE_SQL = "SELECT cash_balance FROM metrics WHERE id = 1"
+    INSERT_MOVEMENT_SQL = """
+        INSERT INTO inventory_movements
+        (product_id, movement_type, quantity, unit_cost, movement_date)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    INSERT_CASH_SQL = """
+        INSERT INTO cash_movements(description, amount, movement_type, movement_date)
+        VALUES (?, ?, ?, ?)
+    """
+
+    PRODUCTS_SQL = "SELECT * FROM products ORDER BY name"
+    ALL_SALES_SQL = """
+        SELECT s.id, p.product_code, p.name, s.quantity, s.sale_price, s.sale_date
+        FROM sales s
+        JOIN products p ON p.id = s.product_id
+        ORDER BY s.sale_date ASC, s.id ASC
+    """
+    # 화면 표시용 행. 금액 서식을 SQL에서 끝내 Treeview에 그대로 넣을 튜플로 받는다.
+    PRODUCT_VIEW_SQL = """
+        SELECT product_code, name, printf('%.2f', cost), printf('%.2f', price), stock, reorder_level
+        FROM products
+        ORDER BY name
+    """
+    SALES_VIEW_SQL = """
+        SELECT s.sale_date, p.name, s.quantity, printf('%.2f', s.sale_price)
+        FROM sales s
+        JOIN products p ON p.id = s.product_id
+        ORDER BY s.sale_date DESC, s.id DESC
+        LIMIT ?
+    """
+
+    # 백업/복원 시 한 번에 옮길 페이지 수
+    BACKUP_PAGES = 1000
+
+    # 스키마 전체. executescript로 한 번에 파싱·실행한다(모든 문장은 여러 번 실행해도 안전하다).
+    SCHEMA_SQL = """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_code TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            cost REAL NOT NULL,
+            price REAL NOT NULL,
+            stock INTEGER NOT NULL DEFAULT 0,
+            reorder_level INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS inventory_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            movement_type TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_cost REAL NOT NULL,
+            movement_date TEXT NOT NULL,
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            sale_price REAL NOT NULL,
+            sale_date TEXT NOT NULL,
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        );
+
+        CREATE TABLE IF NOT EXISTS cash_movements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            description TEXT NOT NULL,
+            amount REAL NOT NULL,
+            movement_type TEXT NOT NULL,
+            movement_date TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS tax_settings (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            vat_rate REAL NOT NULL,
+            income_tax_rate REAL NOT NULL
+        );
+
+        -- 월 단위 범위 집계가 인덱스만 읽고 끝나도록 필요한 열을 모두 포함한 인덱스를 둔다.
+        CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date, product_id, quantity, sale_price);
+        CREATE INDEX IF NOT EXISTS idx_inv_mov_type_date
+            ON inventory_movements(movement_type, movement_date, quantity, unit_cost);
+        CREATE INDEX IF NOT EXISTS idx_cash_date ON cash_movements(movement_date, amount);
+
+        INSERT INTO tax_settings(id, vat_rate, income_tax_rate)
+        VALUES (1, 0.10, 0.10)
+        ON CONFLICT(id) DO NOTHING;
+
+        -- 재고 가치와 현금 잔액은 트리거로 누계를 유지해 전체 테이블을 매번 합산하지 않는다.
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            inventory_value REAL NOT NULL,
+            cash_balance REAL NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_products_metrics_insert AFTER INSERT ON products
+        BEGIN
+            UPDATE metrics SET inventory_value = inventory_value + NEW.stock * NEW.cost WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_products_metrics_update AFTER UPDATE OF stock, cost ON products
+        BEGIN
+            UPDATE metrics
+            SET inventory_value = inventory_value - OLD.stock * OLD.cost + NEW.stock * NEW.cost
+            WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_products_metrics_delete AFTER DELETE ON products
+        BEGIN
+            UPDATE metrics SET inventory_value = inventory_value - OLD.stock * OLD.cost WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cash_metrics_insert AFTER INSERT ON cash_movements
+        BEGIN
+            UPDATE metrics SET cash_balance = cash_balance + NEW.amount WHERE id = 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cash_metrics_delete AFTER DELETE ON cash_movements
+        BEGIN
+            UPDATE metrics SET cash_balance = cash_balance - OLD.amount WHERE id = 1;
+        END;
+
+        INSERT INTO metrics(id, inventory_value, cash_balance)
+        VALUES (
+            1,
+            (SELECT COALESCE(SUM(stock * cost), 0.0) FROM products),
+            (SELECT COALESCE(SUM(amount), 0.0) FROM cash_movements)
+        )
+        ON CONFLICT(id) DO NOTHING;
+
+        -- 월·상품별 판매 수량과 매출 누계. 추세 그래프가 판매 건수와 무관하게 이 작은 표만 읽는다.
+        -- 원가는 조회 시점의 상품 원가를 쓰므로 누계에 넣지 않고 products와 조인한다.
+        CREATE TABLE IF NOT EXISTS monthly_sales (
+            period TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            PRIMARY KEY (period, product_id)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sales_monthly_insert AFTER INSERT ON sales
+        BEGIN
+            INSERT INTO monthly_sales(period, product_id, quantity, revenue)
+            VALUES (substr(NEW.sale_date, 1, 7), NEW.product_id, NEW.quantity, NEW.quantity * NEW.sale_price)
+            ON CONFLICT(period, product_id) DO UPDATE
+            SET quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sales_monthly_delete AFTER DELETE ON sales
+        BEGIN
+            UPDATE monthly_sales
+            SET quantity = quantity - OLD.quantity, revenue = revenue - OLD.quantity * OLD.sale_price
+            WHERE period = substr(OLD.sale_date, 1, 7) AND product_id = OLD.product_id;
+            DELETE FROM monthly_sales
+            WHERE period = substr(OLD.sale_date, 1, 7) AND product_id = OLD.product_id AND quantity = 0;
+        END;
+
+        -- 표가 새로 만들어진 경우에만 기존 판매로 채운다.
+        INSERT INTO monthly_sales(period, product_id, quantity, revenue)
+        SELECT substr(sale_date, 1, 7), product_id, SUM(quantity), SUM(quantity * sale_price)
+        FROM sales
+        WHERE NOT EXISTS (SELECT 1 FROM monthly_sales)
+        GROUP BY substr(sale_date, 1, 7), product_id;
+    """
+
+    # 월간 보고서 전체를 한 번에 계산한다. 매출·원가는 sales↔products 조인을 한 번만 수행하고,
+    # 세금과 파생 지표도 SQL에서 함께 계산해 결과 행을 그대로 반환한다.
+    MONTHLY_SUMMARY_SQL = """
+        WITH base AS (
+            SELECT COALESCE(sa.revenue, 0.0) AS revenue,
+                   COALESCE(sa.cogs, 0.0) AS cogs,
+                   (SELECT COALESCE(SUM(quantity * unit_cost), 0.0)
+                    FROM inventory_movements
+                    WHERE movement_type = 'IN'
+                    AND movement_date >= :start AND movement_date < :end) AS purchases,
+                   (SELECT COALESCE(SUM(amount), 0.0)
+                    FROM cash_movements
+                    WHERE movement_date >= :start AND movement_date < :end) AS cash_flow,
+                   m.inventory_value,
+                   m.cash_balance
+            FROM metrics m, (
+                SELECT SUM(s.quantity * s.sale_price) AS revenue,
+                       SUM(s.quantity * p.cost) AS cogs
+                FROM sales s
+                JOIN products p ON p.id = s.product_id
+                WHERE s.sale_date >= :start AND s.sale_date < :end
+            ) AS sa
+            WHERE m.id = 1
+        ),
+        taxed AS (
+            SELECT base.*,
+                   revenue - cogs AS gross_profit,
+                   revenue * :vat AS vat,
+                   MAX(revenue - cogs, 0) * :itax AS income_tax
+            FROM base
+        )
+        SELECT revenue, cogs, gross_profit, vat, income_tax,
+               gross_profit - income_tax AS net_income,
+               purchases, cash_flow, inventory_value, cash_balance,
+               cash_balance + inventory_value AS assets,
+               vat + income_tax AS liabilities,
+               cash_balance + inventory_value - (vat + income_tax) AS equity
+        FROM taxed
+    """
 
     def __init__(self, db_path: Path = DB_PATH) -> None:
         self.db_path = Path(db_path)
         DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = self._open_connection()
+        # 쓰기가 커밋될 때마다 올라가는 버전. 집계 캐시 키에 넣어 변경 이후의 결과만 재사용한다.
+        self._data_version = 0
+        self._result_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
         self._initialize()
-
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = _dict_factory
+        # 다른 연결(같은 DB 파일을 여는 웹 앱·데스크톱 앱)의 커밋은 PRAGMA data_version으로 감지한다.
+        self._external_version = self._read_external_version()
+        # 세율은 거의 바뀌지 않으므로 메모리에 두고 update_tax_rates/restore 때나 다른 프로세스가 커밋했을 때만 다시 읽는다.
+        self._tax_rates = self._load_tax_rates()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        # isolation_level=None: 읽기는 암묵적 BEGIN 없이 실행하고, 쓰기만 명시적으로 BEGIN한다.
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+        )
+        # sqlite3.Row는 C 수준에서 행을 만들며 열 이름과 인덱스로 모두 접근할 수 있다.
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
         return conn
 
-    def _initialize(self) -> None:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_code TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    cost REAL NOT NULL,
-                    price REAL NOT NULL,
-                    stock INTEGER NOT NULL DEFAULT 0,
-                    reorder_level INTEGER NOT NULL DEFAULT 0
-                )
-                """
-            )
+    def close(self) -> None:
+        """공유 연결을 닫는다. 앱 종료 시 한 번 호출한다."""
 
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS inventory_movements (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER NOT NULL,
-                    movement_type TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    unit_cost REAL NOT NULL,
-                    movement_date TEXT NOT NULL,
-                    FOREIGN KEY(product_id) REFERENCES products(id)
-                )
-                """
-            )
+        with self._lock:
+            # 이번 세션의 쿼리 패턴을 바탕으로 필요한 경우에만 통계를 갱신한다.
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
 
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS sales (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    sale_price REAL NOT NULL,
-                    sale_date TEXT NOT NULL,
-                    FOREIGN KEY(product_id) REFERENCES products(id)
-                )
-                """
-            )
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """공유 연결을 잠근 채 빌려준다. 읽기 전용 조회에 사용한다."""
 
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS cash_movements (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    description TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    movement_type TEXT NOT NULL,
-                    movement_date TEXT NOT NULL
-                )
-                """
-            )
+        with self._lock:
+            yield self._conn
 
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tax_settings (
-                    id INTEGER PRIMARY KEY CHECK (id = 1),
-                    vat_rate REAL NOT NULL,
-                    income_tax_rate REAL NOT NULL
-                )
-                """
-            )
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Cursor]:
+        """사용자 동작 하나를 BEGIN IMMEDIATE 트랜잭션으로 묶어 한 번에 커밋한다."""
 
-            cur.execute(
-                """
-                INSERT INTO tax_settings(id, vat_rate, income_tax_rate)
-                VALUES (1, 0.10, 0.10)
-                ON CONFLICT(id) DO NOTHING
-                """
-            )
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                yield cur
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            self._data_version += 1
+
+    @property
+    def data_version(self) -> int:
+        """커밋된 변경이 있을 때마다 증가하는 값. 파생 결과를 캐시하는 쪽에서 키로 쓴다.
+
+        이 연결의 커밋뿐 아니라 다른 프로세스가 같은 DB 파일에 커밋한 경우에도 증가한다.
+        """
+
+        self._check_external_changes()
+        return self._data_version
+
+    def _read_external_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_changes(self) -> None:
+        # PRAGMA data_version은 다른 연결이 커밋했을 때만 값이 바뀐다(이 연결의 커밋은 _tx에서 센다).
+        with self._lock:
+            external = self._read_external_version()
+            if external != self._external_version:
+                self._external_version = external
+                self._data_version += 1
+                self._tax_rates = self._load_tax_rates()
+
+    def _cached(self, key: Tuple[Hashable, ...], compute: Callable[[], Any]) -> Any:
+        # 잠금을 쥔 채 조회·계산해 버전이 바뀌는 도중의 결과가 캐시에 섞이지 않게 한다.
+        with self._lock:
+            self._check_external_changes()
+            key = (*key, self._data_version)
+            cache = self._result_cache
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            value = compute()
+            cache[key] = value
+            if len(cache) > self.RESULT_CACHE_SIZE:
+                cache.popitem(last=False)
+            return value
+
+    def _initialize(self) -> None:
+        # executescript는 대기 중인 트랜잭션을 먼저 커밋하므로 BEGIN을 스크립트 안에 두고,
+        # 이어지는 조건부 마이그레이션까지 같은 트랜잭션에서 커밋한다.
+        with self._connect() as conn:
+            try:
+                conn.executescript("BEGIN IMMEDIATE;\n" + self.SCHEMA_SQL)
+                cur = conn.cursor()
+                # 월별 추세는 monthly_sales 표에서 읽으므로, 예전 DB에 남은 월 생성 열과 그 인덱스를 없앤다
+                # (판매를 넣을 때마다 인덱스를 갱신하는 비용만 남기 때문).
+                cur.execute("DROP INDEX IF EXISTS idx_sales_month")
+                cur.execute("SELECT name FROM pragma_table_xinfo('sales')")
+                if "sale_month" in {row["name"] for row in cur.fetchall()}:
+                    try:
+                        cur.execute("ALTER TABLE sales DROP COLUMN sale_month")
+                    except sqlite3.OperationalError:
+                        pass  # DROP COLUMN이 없는 SQLite(3.35 미만)에서는 읽는 곳 없는 VIRTUAL 열로 둔다.
+                # 통계가 한 번도 수집되지 않은 DB라면 플래너가 인덱스를 고를 수 있도록 ANALYZE를 실행한다.
+                cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+                if cur.fetchone() is None:
+                    cur.execute("ANALYZE")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
             conn.commit()
 
     # Product operations -------------------------------------------------
@@ -225,48 +484,78 @@ class DatabaseManager:
         stock: int,
         reorder_level: int,
     ) -> None:
-        with self._connect() as conn:
-            cur = conn.cursor()
+        with self._tx() as cur:
+            # 기존 상품은 행을 지우지 않고 제자리에서 갱신해 id와 판매·재고 이력을 유지한다.
+            # 초기 재고와 입고 기록은 새로 등록된 상품에만 반영한다.
             cur.execute(
                 """
-                INSERT OR REPLACE INTO products
-                (product_code, name, cost, price, stock, reorder_level)
+                INSERT INTO products (product_code, name, cost, price, stock, reorder_level)
                 VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(product_code) DO NOTHING
                 """,
                 (product_code, name, cost, price, stock, reorder_level),
             )
-            product_id = cur.lastrowid
-            if stock:
-                self._log_inventory_movement(cur, product_id, "IN", stock, cost)
-            conn.commit()
+            if cur.rowcount:
+                if stock:
+                    today_iso = dt.date.today().isoformat()
+                    self._log_inventory_movement(cur, cur.lastrowid, "IN", stock, cost, today_iso)
+                return
+            cur.execute(
+                """
+                UPDATE products
+                SET name = ?, cost = ?, price = ?, reorder_level = ?
+                WHERE product_code = ?
+                """,
+                (name, cost, price, reorder_level, product_code),
+            )
 
     def restock(self, product_code: str, quantity: int) -> None:
-        product = self.get_product(product_code)
-        if not product:
-            raise ValueError("해당 상품을 찾을 수 없습니다.")
-        with self._connect() as conn:
-            cur = conn.cursor()
+        with self._tx() as cur:
             cur.execute(
-                "UPDATE products SET stock = stock + ? WHERE product_code = ?",
+                "UPDATE products SET stock = stock + ? WHERE product_code = ? RETURNING id, name, cost",
                 (quantity, product_code),
             )
-            self._log_inventory_movement(cur, product["id"], "IN", quantity, product["cost"])
-            self._log_cash(cur, f"{product['name']} 매입", -(product["cost"] * quantity))
-            conn.commit()
-
-    def get_product(self, product_code: str) -> Optional[Dict]:
+            product = cur.fetchone()
+            if not product:
+                raise ValueError("해당 상품을 찾을 수 없습니다.")
+            today_iso = dt.date.today().isoformat()
+            cost = float(product["cost"])
+            self._log_inventory_movement(cur, product["id"], "IN", quantity, cost, today_iso)
+            self._log_cash(cur, f"{product['name']} 매입", -(cost * quantity), today_iso)
+
+    def get_product(self, product_code: str) -> Optional[sqlite3.Row]:
+        # 자주 불리는 단건 조회는 커서 생성 없이 공유 연결에서 바로 실행해 구문 캐시를 탄다.
+        with self._lock:
+            return self._conn.execute(self.PRODUCT_BY_CODE_SQL, (product_code,)).fetchone()
+
+    def _get_product(self, cur: sqlite3.Cursor, product_code: str) -> Optional[sqlite3.Row]:
+        cur.execute(self.PRODUCT_BY_CODE_SQL, (product_code,))
+        return cur.fetchone()
+
+    def fetch_products(self) -> List[sqlite3.Row]:
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM products WHERE product_code = ?", (product_code,))
-            return cur.fetchone()
+            cur.execute(self.PRODUCTS_SQL)
+            return cur.fetchall() or []
+
+    def fetch_product_view_rows(self) -> List[Tuple]:
+        return self._fetch_tuples(self.PRODUCT_VIEW_SQL)
 
-    def fetch_products(self) -> List[Dict]:
+    def fetch_products_columns(self) -> Dict[str, List]:
+        """fetch_products와 같은 결과를 열 이름 → 값 목록 형태로 돌려준다(DataFrame 생성용)."""
+
+        return self._fetch_columns(self.PRODUCTS_SQL)
+
+    def fetch_product_codes(self) -> List[str]:
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM products ORDER BY name")
-            return cur.fetchall() or []
+            cur.execute("SELECT product_code FROM products ORDER BY name")
+            return [row[0] for row in cur.fetchall()]
+
+    def get_low_stock(self) -> List[sqlite3.Row]:
+        return self._cached(("low_stock",), self._query_low_stock)
 
-    def get_low_stock(self) -> List[Dict]:
+    def _query_low_stock(self) -> List[sqlite3.Row]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
@@ -276,19 +565,25 @@ class DatabaseManager:
 
     # Sales ---------------------------------------------------------------
     def record_sale(self, product_code: str, quantity: int) -> Dict:
-        product = self.get_product(product_code)
-        if not product:
-            raise ValueError("해당 상품을 찾을 수 없습니다.")
-        if product["stock"] < quantity:
-            raise ValueError("재고가 부족합니다.")
-        sale_price = product["price"]
-        cost = product["cost"]
-        with self._connect() as conn:
-            cur = conn.cursor()
+        with self._tx() as cur:
+            # 재고 확인과 차감을 한 문장으로 처리하고, 실패했을 때만 원인을 구분하려고 다시 조회한다.
             cur.execute(
-                "UPDATE products SET stock = stock - ? WHERE id = ?",
-                (quantity, product["id"]),
+                """
+                UPDATE products SET stock = stock - ?
+                WHERE product_code = ? AND stock >= ?
+                RETURNING *
+                """,
+                (quantity, product_code, quantity),
             )
+            product = cur.fetchone()
+            if not product:
+                if not self._get_product(cur, product_code):
+                    raise ValueError("해당 상품을 찾을 수 없습니다.")
+                raise ValueError("재고가 부족합니다.")
+            # RETURNING은 정수 값으로 저장된 REAL 열을 int로 돌려줄 수 있어 float로 맞춘다.
+            sale_price = float(product["price"])
+            cost = float(product["cost"])
+            today_iso = dt.date.today().isoformat()
             cur.execute(
                 """
                 INSERT INTO sales(product_id, quantity, sale_price, sale_date)
@@ -298,12 +593,11 @@ class DatabaseManager:
                     product["id"],
                     quantity,
                     sale_price,
-                    dt.date.today().isoformat(),
+                    today_iso,
                 ),
             )
-            self._log_inventory_movement(cur, product["id"], "OUT", quantity, cost)
-            self._log_cash(cur, f"{product['name']} 판매 수익", sale_price * quantity)
-            conn.commit()
+            self._log_inventory_movement(cur, product["id"], "OUT", quantity, cost, today_iso)
+            self._log_cash(cur, f"{product['name']} 판매 수익", sale_price * quantity, today_iso)
         return {
             "product": product,
             "quantity": quantity,
@@ -312,7 +606,7 @@ class DatabaseManager:
             "cogs": cost * quantity,
         }
 
-    def fetch_sales(self, limit: int = 50) -> List[Dict]:
+    def fetch_sales(self, limit: int = 50) -> List[sqlite3.Row]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
@@ -327,201 +621,188 @@ class DatabaseManager:
             )
             return cur.fetchall() or []
 
-    def fetch_all_sales(self) -> List[Dict]:
+    def fetch_sales_view_rows(self, limit: int = 50) -> List[Tuple]:
+        return self._fetch_tuples(self.SALES_VIEW_SQL, (limit,))
+
+    def _fetch_tuples(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        # 이 커서만 row_factory를 끄고 sqlite3가 만드는 일반 튜플을 그대로 받는다.
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT s.id, p.product_code, p.name, s.quantity, s.sale_price, s.sale_date
-                FROM sales s
-                JOIN products p ON p.id = s.product_id
-                ORDER BY s.sale_date ASC, s.id ASC
-                """
-            )
+            cur.row_factory = None
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def fetch_all_sales(self) -> List[sqlite3.Row]:
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(self.ALL_SALES_SQL)
             return cur.fetchall() or []
 
+    def fetch_all_sales_columns(self) -> Dict[str, List]:
+        return self._fetch_columns(self.ALL_SALES_SQL)
+
+    def _fetch_columns(self, sql: str) -> Dict[str, List]:
+        with self._connect() as conn:
+            cur = conn.cursor()
+            cur.execute(sql)
+            rows = cur.fetchall()
+            names = [col[0] for col in cur.description]
+        columns = zip(*rows) if rows else ([] for _ in names)
+        return {name: list(values) for name, values in zip(names, columns)}
+
     # Financial helpers --------------------------------------------------
     def get_tax_rates(self) -> Dict[str, float]:
+        self._check_external_changes()
+        return dict(self._tax_rates)
+
+    def _load_tax_rates(self) -> Dict[str, float]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute("SELECT vat_rate, income_tax_rate FROM tax_settings WHERE id = 1")
-            return cur.fetchone()
+            return dict(cur.fetchone())
 
     def update_tax_rates(self, vat_rate: float, income_tax_rate: float) -> None:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                "UPDATE tax_settings SET vat_rate = ?, income_tax_rate = ? WHERE id = 1",
-                (vat_rate, income_tax_rate),
-            )
-            conn.commit()
+        # 새 버전의 캐시가 옛 세율로 채워지지 않도록 커밋과 세율 갱신을 한 잠금 안에서 한다.
+        with self._lock:
+            with self._tx() as cur:
+                cur.execute(
+                    "UPDATE tax_settings SET vat_rate = ?, income_tax_rate = ? WHERE id = 1",
+                    (vat_rate, income_tax_rate),
+                )
+            self._tax_rates = {"vat_rate": vat_rate, "income_tax_rate": income_tax_rate}
 
     def get_monthly_summary(self, year: int, month: int) -> Dict[str, float]:
+        return dict(self._cached(("summary", year, month), lambda: self._query_monthly_summary(year, month)))
+
+    def _query_monthly_summary(self, year: int, month: int) -> Dict[str, float]:
         start = dt.date(year, month, 1)
         if month == 12:
             end = dt.date(year + 1, 1, 1)
         else:
             end = dt.date(year, month + 1, 1)
 
+        tax_rates = self.get_tax_rates()
+        params = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "vat": tax_rates["vat_rate"],
+            "itax": tax_rates["income_tax_rate"],
+        }
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT SUM(quantity * sale_price) AS revenue,
-                       SUM(quantity * p.cost) AS cogs
-                FROM sales s
-                JOIN products p ON p.id = s.product_id
-                WHERE s.sale_date >= ? AND s.sale_date < ?
-                """,
-                (start.isoformat(), end.isoformat()),
-            )
-            row = cur.fetchone() or {}
-            revenue = row.get("revenue") or 0.0
-            cogs = row.get("cogs") or 0.0
-
-            cur.execute(
-                """
-                SELECT SUM(quantity * unit_cost) AS purchases
-                FROM inventory_movements
-                WHERE movement_type = 'IN'
-                AND movement_date >= ? AND movement_date < ?
-                """,
-                (start.isoformat(), end.isoformat()),
-            )
-            purchases = (cur.fetchone() or {}).get("purchases") or 0.0
+            cur.execute(self.MONTHLY_SUMMARY_SQL, params)
+            return dict(cur.fetchone())
 
-            cur.execute(
-                """
-                SELECT SUM(amount) AS cash_flow
-                FROM cash_movements
-                WHERE movement_date >= ? AND movement_date < ?
-                """,
-                (start.isoformat(), end.isoformat()),
-            )
-            cash_flow = (cur.fetchone() or {}).get("cash_flow") or 0.0
-
-        tax_rates = self.get_tax_rates()
-        gross_profit = revenue - cogs
-        vat = revenue * tax_rates["vat_rate"]
-        income_tax = max(gross_profit, 0) * tax_rates["income_tax_rate"]
-        net_income = gross_profit - income_tax
+    def get_inventory_value(self) -> float:
+        with self._lock:
+            return self._conn.execute(self.INVENTORY_VALUE_SQL).fetchone()[0]
 
-        inventory_value = self.get_inventory_value()
-        cash_balance = self.get_cash_balance()
+    def get_cash_balance(self) -> float:
+        with self._lock:
+            return self._conn.execute(self.CASH_BALANCE_SQL).fetchone()[0]
 
-        return {
-            "revenue": revenue,
-            "cogs": cogs,
-            "gross_profit": gross_profit,
-            "vat": vat,
-            "income_tax": income_tax,
-            "net_income": net_income,
-            "purchases": purchases,
-            "cash_flow": cash_flow,
-            "inventory_value": inventory_value,
-            "cash_balance": cash_balance,
-            "assets": cash_balance + inventory_value,
-            "liabilities": vat + income_tax,
-            "equity": cash_balance + inventory_value - (vat + income_tax),
-        }
+    def get_monthly_trends(self, months: int = 12) -> List[Dict]:
+        return self._cached(("trends", months), lambda: self._query_monthly_trends(months))
 
-    def get_inventory_value(self) -> float:
+    def _query_monthly_trends(self, months: int) -> List[Dict]:
+        # 최근 N개월을 고른 뒤 기간 오름차순으로 돌려준다. 세금 계산도 SQL 안에서 끝낸다.
+        rates = self.get_tax_rates()
         with self._connect() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT SUM(stock * cost) AS value FROM products")
-            return (cur.fetchone() or {}).get("value") or 0.0
+            cur.execute(
+                """
+                SELECT period,
+                       revenue,
+                       revenue - cogs AS gross_profit,
+                       revenue * :vat AS vat,
+                       MAX(revenue - cogs, 0) * :itax AS income_tax
+                FROM (
+                    SELECT m.period,
+                           COALESCE(SUM(m.revenue), 0.0) AS revenue,
+                           COALESCE(SUM(m.quantity * p.cost), 0.0) AS cogs
+                    FROM monthly_sales m
+                    JOIN products p ON p.id = m.product_id
+                    GROUP BY m.period
+                    ORDER BY period DESC
+                    LIMIT :months
+                )
+                ORDER BY period
+                """,
+                {"vat": rates["vat_rate"], "itax": rates["income_tax_rate"], "months": months},
+            )
+            return [dict(row) for row in cur.fetchall()]
 
-    def get_cash_balance(self) -> float:
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT SUM(amount) AS balance FROM cash_movements")
-            return (cur.fetchone() or {}).get("balance") or 0.0
+    def get_yearly_sales(self, year: int) -> List[sqlite3.Row]:
+        """연도 안의 월별 매출·원가를 한 번에 집계한다. 판매가 없는 달은 결과에 없다."""
 
-    def get_monthly_trends(self, months: int = 12) -> List[Dict]:
         with self._connect() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
-                SELECT substr(s.sale_date, 1, 7) AS period,
+                SELECT CAST(substr(s.sale_date, 6, 2) AS INTEGER) AS month,
                        SUM(s.quantity * s.sale_price) AS revenue,
                        SUM(s.quantity * p.cost) AS cogs
                 FROM sales s
                 JOIN products p ON p.id = s.product_id
-                GROUP BY period
-                ORDER BY period DESC
-                LIMIT ?
+                WHERE s.sale_date >= :start AND s.sale_date < :end
+                GROUP BY month
                 """,
-                (months,),
-            )
-            rows = cur.fetchall() or []
-        rates = self.get_tax_rates()
-        trend: List[Dict] = []
-        for row in reversed(rows):
-            revenue = row.get("revenue") or 0.0
-            cogs = row.get("cogs") or 0.0
-            gross = revenue - cogs
-            trend.append(
-                {
-                    "period": row.get("period"),
-                    "revenue": revenue,
-                    "gross_profit": gross,
-                    "vat": revenue * rates["vat_rate"],
-                    "income_tax": max(gross, 0) * rates["income_tax_rate"],
-                }
+                {"start": f"{year:04d}-01-01", "end": f"{year + 1:04d}-01-01"},
             )
-        return trend
+            return cur.fetchall()
 
     def bulk_upsert_products(self, rows: List[Dict]) -> None:
         if not rows:
             return
-        with self._connect() as conn:
-            cur = conn.cursor()
-            for row in rows:
-                cur.execute(
-                    """
-                    INSERT INTO products (product_code, name, cost, price, stock, reorder_level)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(product_code) DO UPDATE SET
-                        name = excluded.name,
-                        cost = excluded.cost,
-                        price = excluded.price,
-                        stock = excluded.stock,
-                        reorder_level = excluded.reorder_level
-                    """,
-                    (
-                        row.get("product_code"),
-                        row.get("name"),
-                        float(row.get("cost", 0.0)),
-                        float(row.get("price", 0.0)),
-                        int(row.get("stock", 0)),
-                        int(row.get("reorder_level", 0)),
-                    ),
-                )
-            conn.commit()
+        params = [
+            (
+                row.get("product_code"),
+                row.get("name"),
+                float(row.get("cost", 0.0)),
+                float(row.get("price", 0.0)),
+                int(row.get("stock", 0)),
+                int(row.get("reorder_level", 0)),
+            )
+            for row in rows
+        ]
+        with self._tx() as cur:
+            cur.executemany(
+                """
+                INSERT INTO products (product_code, name, cost, price, stock, reorder_level)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(product_code) DO UPDATE SET
+                    name = excluded.name,
+                    cost = excluded.cost,
+                    price = excluded.price,
+                    stock = excluded.stock,
+                    reorder_level = excluded.reorder_level
+                """,
+                params,
+            )
 
     def replace_sales(self, rows: List[Dict]) -> None:
-        with self._connect() as conn:
-            cur = conn.cursor()
+        with self._tx() as cur:
             cur.execute("DELETE FROM sales")
-            products = {p["product_code"]: p["id"] for p in self.fetch_products()}
-            for row in rows:
-                code = row.get("product_code")
-                product_id = products.get(code)
-                if not product_id:
-                    continue
-                cur.execute(
-                    """
-                    INSERT INTO sales (product_id, quantity, sale_price, sale_date)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (
-                        product_id,
-                        int(row.get("quantity", 0)),
-                        float(row.get("sale_price", 0.0)),
-                        str(row.get("sale_date") or dt.date.today().isoformat()),
-                    ),
+            cur.execute("SELECT product_code, id FROM products")
+            products = {p["product_code"]: p["id"] for p in cur.fetchall()}
+            today_iso = dt.date.today().isoformat()
+            params = [
+                (
+                    products[row.get("product_code")],
+                    int(row.get("quantity", 0)),
+                    float(row.get("sale_price", 0.0)),
+                    str(row.get("sale_date") or today_iso),
                 )
-            conn.commit()
+                for row in rows
+                if products.get(row.get("product_code"))
+            ]
+            cur.executemany(
+                """
+                INSERT INTO sales (product_id, quantity, sale_price, sale_date)
+                VALUES (?, ?, ?, ?)
+                """,
+                params,
+            )
 
     def apply_tax_frame(self, data: Dict[str, float]) -> None:
         vat = float(data.get("vat_rate", 0.1))
@@ -536,27 +817,21 @@ class DatabaseManager:
         movement_type: str,
         quantity: int,
         unit_cost: float,
+        movement_date: str,
     ) -> None:
         cur.execute(
-            """
-            INSERT INTO inventory_movements
-            (product_id, movement_type, quantity, unit_cost, movement_date)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (product_id, movement_type, quantity, unit_cost, dt.date.today().isoformat()),
+            self.INSERT_MOVEMENT_SQL,
+            (product_id, movement_type, quantity, unit_cost, movement_date),
         )
 
-    def _log_cash(self, cur: sqlite3.Cursor, description: str, amount: float) -> None:
+    def _log_cash(self, cur: sqlite3.Cursor, description: str, amount: float, movement_date: str) -> None:
         cur.execute(
-            """
-            INSERT INTO cash_movements(description, amount, movement_type, movement_date)
-            VALUES (?, ?, ?, ?)
-            """,
+            self.INSERT_CASH_SQL,
             (
                 description,
                 amount,
                 "IN" if amount >= 0 else "OUT",
-                dt.date.today().isoformat(),
+                movement_date,
             ),
         )
 
@@ -564,65 +839,117 @@ class DatabaseManager:
     def backup(self, destination: Path) -> Path:
         destination = Path(destination)
         destination.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(self.db_path, destination)
+        # 파일을 그대로 복사하지 않고 SQLite 백업 API로 페이지를 옮겨, WAL 상태와 무관하게 완전한 DB를 만든다.
+        target = sqlite3.connect(destination)
+        try:
+            with self._connect() as conn:
+                conn.backup(target, pages=self.BACKUP_PAGES)
+        finally:
+            target.close()
         return destination
 
     def restore(self, source: Path) -> None:
         source = Path(source)
         if not source.exists():
             raise FileNotFoundError(source)
-        shutil.copy2(source, self.db_path)
+        origin = sqlite3.connect(source)
+        try:
+            with self._connect() as conn:
+                origin.backup(conn, pages=self.BACKUP_PAGES)
+                # 누계 테이블이 없던 시절의 백업이면 여기서 만들고 채운다.
+                self._initialize()
+                self._tax_rates = self._load_tax_rates()
+                self._data_version += 1
+        finally:
+            origin.close()
 
 
 class ReportGenerator:
-    """pandas로 손익계산서 등 주요 재무제표를 생성한다."""
+    """손익계산서 등 주요 재무제표를 (머리글, 행 목록) 형태로 만들어 엑셀로 내보낸다."""
 
     def __init__(self, db: DatabaseManager) -> None:
         self.db = db
 
-    def build_profit_and_loss(self, year: int, month: int) -> pd.DataFrame:
-        summary = self.db.get_monthly_summary(year, month)
-        data = {
-            "항목": [
-                "매출액",
-                "매출원가",
-                "매출총이익",
-                "소득세",
-                "당기순이익",
-            ],
-            "금액": [
-                summary["revenue"],
-                summary["cogs"],
-                summary["gross_profit"],
-                summary["income_tax"],
-                summary["net_income"],
-            ],
-        }
-        return pd.DataFrame(data)
+    @staticmethod
+    def build_profit_and_loss(summary: Dict[str, float]) -> Tuple[List[str], List[Tuple]]:
+        rows = [
+            ("매출액", summary["revenue"]),
+            ("매출원가", summary["cogs"]),
+            ("매출총이익", summary["gross_profit"]),
+            ("소득세", summary["income_tax"]),
+            ("당기순이익", summary["net_income"]),
+        ]
+        return ["항목", "금액"], rows
+
+    @staticmethod
+    def build_balance_sheet(summary: Dict[str, float]) -> Tuple[List[str], List[Tuple]]:
+        rows = [
+            ("자산", summary["assets"]),
+            ("부채", summary["liabilities"]),
+            ("자본", summary["equity"]),
+        ]
+        return ["구분", "금액"], rows
+
+    @staticmethod
+    def build_cash_flow(summary: Dict[str, float]) -> Tuple[List[str], List[Tuple]]:
+        rows = [
+            ("영업현금흐름", summary["cash_flow"]),
+            ("상품 매입", -summary["purchases"]),
+            ("순현금", summary["cash_flow"] - summary["purchases"]),
+        ]
+        return ["구분", "금액"], rows
 
-    def build_balance_sheet(self, year: int, month: int) -> pd.DataFrame:
-        summary = self.db.get_monthly_summary(year, month)
-        data = {
-            "구분": ["자산", "부채", "자본"],
-            "금액": [summary["assets"], summary["liabilities"], summary["equity"]],
-        }
-        return pd.DataFrame(data)
+    def export_monthly_reports(self, year: int, month: int, output_path: Path) -> None:
+        import xlsxwriter
 
-    def build_cash_flow(self, year: int, month: int) -> pd.DataFrame:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         summary = self.db.get_monthly_summary(year, month)
-        data = {
-            "구분": ["영업현금흐름", "상품 매입", "순현금"],
-            "금액": [summary["cash_flow"], -summary["purchases"], summary["cash_flow"] - summary["purchases"]],
+        sheets = {
+            "손익계산서": self.build_profit_and_loss(summary),
+            "대차대조표": self.build_balance_sheet(summary),
+            "현금흐름표": self.build_cash_flow(summary),
         }
-        return pd.DataFrame(data)
+        # 보고서는 위에서 아래로 한 번만 쓰므로 constant_memory 모드로 행 단위 스트리밍한다.
+        workbook = xlsxwriter.Workbook(str(output_path), {"constant_memory": True})
+        try:
+            for sheet_name, (headers, rows) in sheets.items():
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, headers)
+                for row_idx, row in enumerate(rows, start=1):
+                    worksheet.write_row(row_idx, 0, row)
+        finally:
+            workbook.close()
+
+    def export_yearly_reports(self, year: int, output_path: Path) -> None:
+        """12개월 손익을 한 시트로 내보낸다. 월별 세금 계산은 numpy 배열 연산으로 한 번에 처리한다."""
+
+        import numpy as np
+        import xlsxwriter
 
-    def export_monthly_reports(self, year: int, month: int, output_path: Path) -> None:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with pd.ExcelWriter(output_path) as writer:
-            self.build_profit_and_loss(year, month).to_excel(writer, sheet_name="손익계산서", index=False)
-            self.build_balance_sheet(year, month).to_excel(writer, sheet_name="대차대조표", index=False)
-            self.build_cash_flow(year, month).to_excel(writer, sheet_name="현금흐름표", index=False)
+        revenue = np.zeros(12)
+        cogs = np.zeros(12)
+        for row in self.db.get_yearly_sales(year):
+            revenue[row["month"] - 1] = row["revenue"]
+            cogs[row["month"] - 1] = row["cogs"]
+        rates = self.db.get_tax_rates()
+        gross = revenue - cogs
+        vat = revenue * rates["vat_rate"]
+        income_tax = np.maximum(gross, 0) * rates["income_tax_rate"]
+        net_income = gross - income_tax
+        table = np.column_stack((revenue, cogs, gross, vat, income_tax, net_income))
+
+        workbook = xlsxwriter.Workbook(str(output_path), {"constant_memory": True})
+        try:
+            worksheet = workbook.add_worksheet(f"{year}년 손익")
+            worksheet.write_row(0, 0, ["월", "매출액", "매출원가", "매출총이익", "부가세", "소득세", "당기순이익"])
+            for month, values in enumerate(table.tolist(), start=1):
+                worksheet.write_row(month, 0, [f"{month}월", *values])
+            worksheet.write_row(13, 0, ["합계", *table.sum(axis=0).tolist()])
+        finally:
+            workbook.close()
 
 
 class SyncManager:
@@ -631,23 +958,41 @@ class SyncManager:
     def __init__(self, db: DatabaseManager) -> None:
         self.db = db
         SYNC_DIR.mkdir(parents=True, exist_ok=True)
+        # 자동 동기화(작업 스레드)와 수동 내보내기·가져오기 후 내보내기(Tk 스레드)가 같은 파일을 동시에 쓰지 않게 한다.
+        self._export_lock = threading.Lock()
 
     def export_documents(self) -> Tuple[Path, Path]:
+        with self._export_lock:
+            return self._export_documents()
+
+    def _export_documents(self) -> Tuple[Path, Path]:
+        import csv
+        import pandas as pd
+
         frames = self._build_frames()
         excel_path = EXCEL_SYNC_PATH
         tsv_path = TSV_SYNC_PATH
-        with pd.ExcelWriter(excel_path) as writer:
+        # 쓰기는 openpyxl보다 빠른 xlsxwriter로 한다. 읽기(read_excel)는 계속 openpyxl을 쓴다.
+        with pd.ExcelWriter(excel_path, engine="xlsxwriter") as writer:
             for sheet, frame in frames.items():
                 frame.to_excel(writer, sheet_name=sheet, index=False)
         with open(tsv_path, "w", newline="", encoding="utf-8") as fp:
             writer = csv.writer(fp, delimiter="\t")
             writer.writerow(["table", "json"])
             for name, frame in frames.items():
-                for row in frame.to_dict("records"):
-                    writer.writerow([name, json.dumps(row, ensure_ascii=False)])
+                # to_dict("records")의 행별 Series 변환 대신 열을 한 번씩 파이썬 목록으로 꺼내 묶는다.
+                # 실수는 json.dumps가 repr로 써야 왕복 시 값이 그대로 보존된다.
+                columns = [str(column) for column in frame.columns]
+                values = [frame[column].tolist() for column in frame.columns]
+                writer.writerows(
+                    (name, json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    for row in zip(*values)
+                )
         return excel_path, tsv_path
 
     def import_from_excel(self, path: Optional[Path] = None) -> None:
+        import pandas as pd
+
         target = Path(path) if path else EXCEL_SYNC_PATH
         if not target.exists():
             raise FileNotFoundError(target)
@@ -655,24 +1000,31 @@ class SyncManager:
         self._apply_frames(frames)
 
     def import_from_tsv(self, path: Optional[Path] = None) -> None:
+        import csv
+        import pandas as pd
+
         target = Path(path) if path else TSV_SYNC_PATH
         if not target.exists():
             raise FileNotFoundError(target)
         mapping: Dict[str, List[Dict]] = {}
-        df = pd.read_csv(target, delimiter="\t")
-        for _, row in df.iterrows():
-            table = row.get("table")
-            payload = row.get("json")
-            if not table or not payload:
-                continue
-            mapping.setdefault(table, []).append(json.loads(payload))
+        # 행마다 JSON 한 덩어리이므로 DataFrame을 거치지 않고 csv 모듈로 바로 읽는다.
+        with open(target, newline="", encoding="utf-8") as fp:
+            reader = csv.reader(fp, delimiter="\t")
+            next(reader, None)
+            for record in reader:
+                if len(record) < 2 or not record[0] or not record[1]:
+                    continue
+                mapping.setdefault(record[0], []).append(json.loads(record[1]))
         frames = {name: pd.DataFrame(records) for name, records in mapping.items()}
         self._apply_frames(frames)
 
     def _build_frames(self) -> Dict[str, pd.DataFrame]:
+        import pandas as pd
+
         frames: Dict[str, pd.DataFrame] = {}
-        frames["products"] = pd.DataFrame(self.db.fetch_products())
-        frames["sales"] = pd.DataFrame(self.db.fetch_all_sales())
+        # 열 단위 목록으로 받아 행마다 열을 추론하지 않고 한 번에 DataFrame을 만든다.
+        frames["products"] = pd.DataFrame(self.db.fetch_products_columns(), copy=False)
+        frames["sales"] = pd.DataFrame(self.db.fetch_all_sales_columns(), copy=False)
         frames["tax_settings"] = pd.DataFrame([self.db.get_tax_rates()])
         return frames
 
@@ -686,33 +1038,93 @@ class SyncManager:
         self.export_documents()
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TaxInvoice:
     product_code: str
     product_name: str
     quantity: int
     unit_price: float
     vat_rate: float
-
-    @property
-    def subtotal(self) -> float:
-        return self.quantity * self.unit_price
-
-    @property
-    def vat(self) -> float:
-        return self.subtotal * self.vat_rate
-
-    @property
-    def total(self) -> float:
-        return self.subtotal + self.vat
-
-    def to_row(self) -> List:
-        return [self.product_code, self.product_name, self.quantity, self.unit_price, self.subtotal, self.vat, self.total]
+    # 합계는 생성 시 한 번만 계산해 둔다.
+    subtotal: float = field(init=False)
+    vat: float = field(init=False)
+    total: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        subtotal = self.quantity * self.unit_price
+        vat = subtotal * self.vat_rate
+        object.__setattr__(self, "subtotal", subtotal)
+        object.__setattr__(self, "vat", vat)
+        object.__setattr__(self, "total", subtotal + vat)
+
+    def to_row(self) -> Tuple:
+        return (self.product_code, self.product_name, self.quantity, self.unit_price, self.subtotal, self.vat, self.total)
+
+
+# 세금계산서 CSV. 모양이 정해진 한 줄이므로 csv.writer 없이 직접 만든다(csv 모듈 기본 방언과 같은 출력).
+_INVOICE_HEADER = "발행 시각,상품 코드,상품명,수량,단가,공급가액,부가세,총액\r\n"
+_CSV_SPECIAL = frozenset(',"\r\n')
+
+
+def _csv_line(values: Tuple) -> str:
+    fields = []
+    for value in values:
+        text = str(value)
+        if not _CSV_SPECIAL.isdisjoint(text):
+            # 상품명 등 사용자 입력에 구분자·따옴표·줄바꿈이 있으면 csv와 같이 따옴표로 감싼다.
+            text = '"' + text.replace('"', '""') + '"'
+        fields.append(text)
+    return ",".join(fields) + "\r\n"
+
+
+def _fill_tree(tree: ttk.Treeview, rows: List[Tuple], previous: List[Tuple]) -> None:
+    """지난번에 채운 previous와 비교해 Treeview 내용을 rows로 바꾼다.
+
+    달라진 위치의 값만 고치고 남는 항목은 지우며 모자란 항목은 뒤에 붙인다.
+    항목이 제자리를 지키므로 줄무늬 태그는 다시 매길 필요가 없다.
+    행이 많을 때 ttk 래퍼의 옵션 변환 비용이 커지므로 Tcl 명령을 직접 호출한다.
+    """
+
+    call = tree.tk.call
+    widget = tree._w  # pylint: disable=protected-access
+    children = tree.get_children()
+    for iid, old, new in zip(children, previous, rows):
+        if old != new:
+            call(widget, "item", iid, "-values", new)
+    if len(children) > len(rows):
+        tree.delete(*children[len(rows):])
+    start = len(children)
+    tags = itertools.islice(itertools.cycle(_ROW_TAGS), start % len(_ROW_TAGS), None)
+    for values, tag in zip(rows[start:], tags):
+        call(widget, "insert", "", "end", "-values", values, "-tags", tag)
 
 
 class InventoryApp:
     """한글 기반 Tkinter 사용자 인터페이스."""
 
+    STARTUP_SYNC_DELAY_MS = 1000
+    SYNC_RETRY_MS = 200
+    # 연속 입력을 한 번의 내보내기로 묶기 위해 마지막 변경 후 기다리는 시간
+    SYNC_DEBOUNCE_MS = 2000
+    # 대시보드 선: (범례 이름, get_monthly_trends 키, 색)
+    CHART_SERIES = (
+        ("매출", "revenue", "#22c55e"),
+        ("영업이익", "gross_profit", "#0ea5e9"),
+        ("부가세", "vat", "#f97316"),
+        ("소득세", "income_tax", "#e11d48"),
+    )
+    # 보고서 탭 요약: (get_monthly_summary 키, 표시 이름)
+    REPORT_ROWS = (
+        ("revenue", "매출액"),
+        ("cogs", "매출원가"),
+        ("gross_profit", "매출총이익"),
+        ("income_tax", "소득세"),
+        ("net_income", "당기순이익"),
+        ("cash_flow", "영업현금흐름"),
+        ("inventory_value", "재고 자산"),
+        ("cash_balance", "현금 잔액"),
+    )
+
     def __init__(self, master: tk.Tk) -> None:
         self.master = master
         master.title("MOW 재고·매출·재무 관리")
@@ -721,6 +1133,26 @@ class InventoryApp:
         self.db = DatabaseManager()
         self.reporter = ReportGenerator(self.db)
         self.sync_manager = SyncManager(self.db)
+        # 판매 탭 콤보박스용 상품 코드와 조회 시점의 db.data_version.
+        # 버전은 다른 프로세스(웹 앱 등)의 커밋에도 오르므로, 바뀌었을 때만 다시 조회한다.
+        self._product_codes: List[str] = []
+        self._product_codes_version: Optional[int] = None
+        # 각 Treeview에 마지막으로 채운 행. 새로 고칠 때 달라진 부분만 반영하는 데 쓴다.
+        self._product_rows: List[Tuple] = []
+        self._sales_rows: List[Tuple] = []
+        # 오늘 날짜의 세금계산서 파일. 첫 판매 때 열고 날짜가 바뀌거나 앱을 닫을 때 닫는다.
+        self._invoice_fp: Optional[IO[str]] = None
+        self._invoice_date: Optional[dt.date] = None
+        # 엑셀 내보내기·백업처럼 오래 걸리는 작업은 작업 스레드에서 돌려 UI가 멈추지 않게 한다.
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mow-worker")
+        # 자동 동기화 상태: 내보낼 변경이 있는지, 예약된 실행이 있는지, 실행 중인 작업
+        self._sync_dirty = False
+        self._sync_job: Optional[str] = None
+        self._sync_future: Optional[Future] = None
+        # 마지막으로 내보낸 시점의 db.data_version. 그 뒤로 커밋이 없으면 다시 쓰지 않는다.
+        self._synced_version: Optional[int] = None
+
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.notebook = ttk.Notebook(master)
         self.notebook.pack(fill=tk.BOTH, expand=True)
@@ -735,7 +1167,8 @@ class InventoryApp:
         self.refresh_products()
         self.refresh_sales()
         self.refresh_dashboard()
-        self.sync_manager.export_documents()
+        # 문서 내보내기는 pandas를 불러오므로 창이 뜨고 잠시 뒤 작업 스레드에서 실행한다.
+        self._schedule_sync(self.STARTUP_SYNC_DELAY_MS)
 
     # Inventory tab ------------------------------------------------------
     def _build_inventory_tab(self) -> None:
@@ -812,23 +1245,10 @@ class InventoryApp:
             messagebox.showerror("오류", str(exc))
 
     def refresh_products(self) -> None:
-        for item in self.products_tree.get_children():
-            self.products_tree.delete(item)
-        for idx, product in enumerate(self.db.fetch_products()):
-            tag = "odd" if idx % 2 else "even"
-            self.products_tree.insert(
-                "",
-                tk.END,
-                values=(
-                    product["product_code"],
-                    product["name"],
-                    f"{product['cost']:.2f}",
-                    f"{product['price']:.2f}",
-                    product["stock"],
-                    product["reorder_level"],
-                ),
-                tags=(tag,),
-            )
+        rows = self.db.fetch_product_view_rows()
+        if rows != self._product_rows:
+            _fill_tree(self.products_tree, rows, self._product_rows)
+            self._product_rows = rows
         low = self.db.get_low_stock()
         if low:
             summary = ", ".join(f"{p['name']} ({p['stock']}개)" for p in low)
@@ -891,27 +1311,42 @@ class InventoryApp:
         self._after_data_change()
 
     def save_invoice(self, invoice: TaxInvoice) -> None:
+        # 판매마다 파일을 열고 닫지 않고, 날짜별 파일 하나를 열어 둔 채 행을 이어 쓴다.
+        now = dt.datetime.now()
+        fp = self._invoice_file_for(now.date())
+        fp.write(_csv_line((now.strftime("%H:%M:%S"), *invoice.to_row())))
+        # 세금계산서는 잃으면 안 되므로 판매마다 버퍼를 비운다(열기·닫기 비용만 없앤다).
+        fp.flush()
+
+    def _invoice_file_for(self, day: dt.date) -> IO[str]:
+        if self._invoice_fp is not None and self._invoice_date == day:
+            return self._invoice_fp
+        self._close_invoice_file()
         invoices_dir = DATA_DIR / "invoices"
         invoices_dir.mkdir(parents=True, exist_ok=True)
-        filename = invoices_dir / f"invoice_{invoice.product_code}_{dt.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        with open(filename, "w", newline="", encoding="utf-8") as fp:
-            writer = csv.writer(fp)
-            writer.writerow(["상품 코드", "상품명", "수량", "단가", "공급가액", "부가세", "총액"])
-            writer.writerow(invoice.to_row())
+        self._invoice_fp = open(
+            invoices_dir / f"invoices_{day.isoformat()}.csv", "a", newline="", encoding="utf-8"
+        )
+        self._invoice_date = day
+        if self._invoice_fp.tell() == 0:
+            self._invoice_fp.write(_INVOICE_HEADER)
+        return self._invoice_fp
+
+    def _close_invoice_file(self) -> None:
+        if self._invoice_fp is not None:
+            self._invoice_fp.close()
+            self._invoice_fp = None
 
     def refresh_sales(self) -> None:
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        products = {p["product_code"]: p for p in self.db.fetch_products()}
-        for idx, sale in enumerate(self.db.fetch_sales()):
-            tag = "odd" if idx % 2 else "even"
-            self.sales_tree.insert(
-                "",
-                tk.END,
-                values=(sale["sale_date"], sale["name"], sale["quantity"], f"{sale['sale_price']:.2f}"),
-                tags=(tag,),
-            )
-        codes = list(products.keys())
+        rows = self.db.fetch_sales_view_rows()
+        if rows != self._sales_rows:
+            _fill_tree(self.sales_tree, rows, self._sales_rows)
+            self._sales_rows = rows
+        version = self.db.data_version
+        if version != self._product_codes_version:
+            self._product_codes = self.db.fetch_product_codes()
+            self._product_codes_version = version
+        codes = self._product_codes
         self.sale_product_combo["values"] = codes
         if codes and not self.sale_product.get():
             self.sale_product.set(codes[0])
@@ -934,6 +1369,7 @@ class InventoryApp:
         ttk.Entry(controls, textvariable=self.report_month, width=4).grid(row=0, column=3, padx=5)
         ttk.Button(controls, text="보고서 보기", command=self.display_report).grid(row=0, column=4, padx=5)
         ttk.Button(controls, text="엑셀로 내보내기", command=self.export_reports).grid(row=0, column=5, padx=5)
+        ttk.Button(controls, text="연간 엑셀 내보내기", command=self.export_yearly_reports).grid(row=0, column=6, padx=5)
 
         self.report_text = tk.Text(
             frame,
@@ -946,20 +1382,9 @@ class InventoryApp:
 
     def display_report(self) -> None:
         summary = self.db.get_monthly_summary(self.report_year.get(), self.report_month.get())
-        lines = ["월간 재무 요약"]
-        for key, label in [
-            ("revenue", "매출액"),
-            ("cogs", "매출원가"),
-            ("gross_profit", "매출총이익"),
-            ("income_tax", "소득세"),
-            ("net_income", "당기순이익"),
-            ("cash_flow", "영업현금흐름"),
-            ("inventory_value", "재고 자산"),
-            ("cash_balance", "현금 잔액"),
-        ]:
-            lines.append(f"{label}: {summary[key]:,.2f}")
+        text = "월간 재무 요약\n" + "\n".join(f"{label}: {summary[key]:,.2f}" for key, label in self.REPORT_ROWS)
         self.report_text.delete("1.0", tk.END)
-        self.report_text.insert(tk.END, "\n".join(lines))
+        self.report_text.insert(tk.END, text)
 
     def export_reports(self) -> None:
         year = self.report_year.get()
@@ -971,81 +1396,107 @@ class InventoryApp:
         )
         if not file_path:
             return
-        self.reporter.export_monthly_reports(year, month, Path(file_path))
-        messagebox.showinfo("재무 보고", "엑셀 파일이 저장되었습니다.")
+        self._run_in_background(
+            lambda: self.reporter.export_monthly_reports(year, month, Path(file_path)),
+            "재무 보고",
+            "엑셀 파일이 저장되었습니다.",
+        )
+
+    def export_yearly_reports(self) -> None:
+        year = self.report_year.get()
+        file_path = filedialog.asksaveasfilename(
+            title="연간 보고서 저장",
+            defaultextension=".xlsx",
+            initialfile=f"report_{year}.xlsx",
+            filetypes=[("Excel", "*.xlsx")],
+        )
+        if not file_path:
+            return
+        self._run_in_background(
+            lambda: self.reporter.export_yearly_reports(year, Path(file_path)),
+            "재무 보고",
+            "연간 엑셀 파일이 저장되었습니다.",
+        )
 
     # Dashboard ---------------------------------------------------------
     def _build_dashboard_tab(self) -> None:
-        frame = ttk.Frame(self.notebook)
-        self.notebook.add(frame, text="그래프 분석")
+        # matplotlib은 불러오는 데 오래 걸리므로 그래프는 탭을 처음 열 때 만든다.
+        self.dashboard_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.dashboard_frame, text="그래프 분석")
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+        # 그래프 탭이 보이지 않을 때 데이터가 바뀌면 표시만 해 두고, 탭을 열 때 한 번 다시 그린다.
+        self._dashboard_stale = False
+
+    def _on_tab_changed(self, _event=None) -> None:
+        if self.notebook.select() != str(self.dashboard_frame):
+            return
+        if not hasattr(self, "chart_ax"):
+            self._build_dashboard_chart()
+            self._dashboard_stale = True
+        if self._dashboard_stale:
+            self.refresh_dashboard()
 
+    def _build_dashboard_chart(self) -> None:
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        frame = self.dashboard_frame
         self.figure = Figure(figsize=(6, 4), dpi=110)
         self.figure.patch.set_facecolor(self.theme.config.surface)
         self.chart_ax = self.figure.add_subplot(111)
-        self.chart_ax.set_facecolor(self.theme.config.background)
         self.chart_canvas = FigureCanvasTkAgg(self.figure, master=frame)
         self.chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         ttk.Button(frame, text="그래프 새로고침", command=self.refresh_dashboard).pack(pady=5)
 
+        # 축 꾸밈·선·범례·안내 문구는 한 번만 만들고, 새로 고칠 때는 선의 데이터와 눈금만 바꾼다.
+        config = self.theme.config
+        ax = self.chart_ax
+        ax.set_facecolor(config.surface)
+        ax.set_title("최근 12개월 매출·이익·세금 추세", color=config.text_color)
+        ax.tick_params(axis="x", rotation=45, labelcolor=config.text_color)
+        ax.tick_params(axis="y", labelcolor=config.text_color)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+        ax.spines["left"].set_color(config.border_color)
+        ax.spines["bottom"].set_color(config.border_color)
+        self._chart_lines = [
+            ax.plot([], [], label=label, linewidth=2.2, marker="o", markersize=6, color=color)[0]
+            for label, _key, color in self.CHART_SERIES
+        ]
+        self._chart_legend = ax.legend(facecolor=config.surface, edgecolor=config.border_color)
+        for text in self._chart_legend.get_texts():
+            text.set_color(config.text_color)
+        self._chart_placeholder = ax.text(
+            0.5,
+            0.5,
+            "표시할 매출 데이터가 없습니다.",
+            transform=ax.transAxes,
+            ha="center",
+            va="center",
+            color=config.text_color,
+            fontsize=14,
+            visible=False,
+        )
+
     def refresh_dashboard(self) -> None:
         if not hasattr(self, "chart_ax"):
             return
-        data = self.db.get_monthly_trends(12)
-        self.chart_ax.clear()
-        self.chart_ax.set_facecolor(self.theme.config.surface)
-        self.figure.patch.set_facecolor(self.theme.config.surface)
-        if not data:
-            self.chart_ax.text(
-                0.5,
-                0.5,
-                "표시할 매출 데이터가 없습니다.",
-                ha="center",
-                va="center",
-                color=self.theme.config.text_color,
-                fontsize=14,
-            )
-            self.chart_canvas.draw_idle()
+        if self.notebook.select() != str(self.dashboard_frame):
+            self._dashboard_stale = True
             return
-        periods = [row["period"] for row in data]
-        metrics = {
-            "매출": {
-                "values": [row["revenue"] for row in data],
-                "color": "#22c55e",
-            },
-            "영업이익": {
-                "values": [row["gross_profit"] for row in data],
-                "color": "#0ea5e9",
-            },
-            "부가세": {
-                "values": [row["vat"] for row in data],
-                "color": "#f97316",
-            },
-            "소득세": {
-                "values": [row["income_tax"] for row in data],
-                "color": "#e11d48",
-            },
-        }
-        for label, meta in metrics.items():
-            self.chart_ax.plot(
-                periods,
-                meta["values"],
-                label=label,
-                linewidth=2.2,
-                marker="o",
-                markersize=6,
-                color=meta["color"],
-            )
-        self.chart_ax.set_title("최근 12개월 매출·이익·세금 추세", color=self.theme.config.text_color)
-        self.chart_ax.tick_params(axis="x", rotation=45, labelcolor=self.theme.config.text_color)
-        self.chart_ax.tick_params(axis="y", labelcolor=self.theme.config.text_color)
-        self.chart_ax.spines["top"].set_visible(False)
-        self.chart_ax.spines["right"].set_visible(False)
-        self.chart_ax.spines["left"].set_color(self.theme.config.border_color)
-        self.chart_ax.spines["bottom"].set_color(self.theme.config.border_color)
-        legend = self.chart_ax.legend(facecolor=self.theme.config.surface, edgecolor=self.theme.config.border_color)
-        for text in legend.get_texts():
-            text.set_color(self.theme.config.text_color)
+        self._dashboard_stale = False
+        data = self.db.get_monthly_trends(12)
+        # 기간은 범주 축 대신 0..n-1 위치에 두고 눈금 글자로 붙인다(지난 기간이 범주로 남지 않게).
+        positions = list(range(len(data)))
+        for line, (_label, key, _color) in zip(self._chart_lines, self.CHART_SERIES):
+            line.set_data(positions, [row[key] for row in data])
+        self.chart_ax.set_xticks(positions)
+        self.chart_ax.set_xticklabels([row["period"] for row in data])
+        self._chart_legend.set_visible(bool(data))
+        self._chart_placeholder.set_visible(not data)
+        self.chart_ax.relim()
+        self.chart_ax.autoscale_view()
         self.figure.tight_layout()
         self.chart_canvas.draw_idle()
 
@@ -1146,8 +1597,11 @@ class InventoryApp:
         )
         if not backup_path:
             return
-        self.db.backup(Path(backup_path))
-        messagebox.showinfo("백업", "백업 파일이 생성되었습니다.")
+        self._run_in_background(
+            lambda: self.db.backup(Path(backup_path)),
+            "백업",
+            "백업 파일이 생성되었습니다.",
+        )
 
     def restore_backup(self) -> None:
         source = filedialog.askopenfilename(title="백업 파일 선택", filetypes=[("DB", "*.db")])
@@ -1158,17 +1612,75 @@ class InventoryApp:
         self._after_data_change()
 
     # Helpers -----------------------------------------------------------
+    def on_close(self) -> None:
+        # 진행 중인 내보내기·백업을 마치고, 아직 내보내지 않은 변경이 있으면 저장한 뒤 연결을 닫는다.
+        self._executor.shutdown(wait=True)
+        if self._sync_dirty:
+            try:
+                self.sync_manager.export_documents()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        self._close_invoice_file()
+        self.db.close()
+        self.master.destroy()
+
+    def _run_in_background(self, task: Callable[[], object], title: str, done_message: str) -> None:
+        """작업을 작업 스레드에 넘기고, 끝나면 Tk 메인 스레드에서 결과를 알린다."""
+
+        def notify(future: Future) -> None:
+            exc = future.exception()
+            if exc is not None:
+                messagebox.showerror(title, str(exc))
+            else:
+                messagebox.showinfo(title, done_message)
+
+        self._poll_future(self._executor.submit(task), notify)
+
+    def _poll_future(self, future: Future, on_done: Callable[[Future], None]) -> None:
+        # Tk 위젯은 메인 스레드에서만 다뤄야 하므로 완료 여부를 after로 확인한다.
+        if not future.done():
+            self.master.after(100, self._poll_future, future, on_done)
+            return
+        on_done(future)
+
+    def _schedule_sync(self, delay_ms: Optional[int] = None) -> None:
+        """동기화 문서 내보내기를 예약한다. 연달아 바뀐 데이터는 한 번의 내보내기로 묶인다."""
+
+        self._sync_dirty = True
+        if self._sync_job is not None:
+            # 새 변경이 들어오면 대기 시간을 다시 센다.
+            self.master.after_cancel(self._sync_job)
+        if delay_ms is None:
+            delay_ms = self.SYNC_DEBOUNCE_MS
+        self._sync_job = self.master.after(delay_ms, self._auto_sync)
+
     def _auto_sync(self) -> None:
-        try:
-            self.sync_manager.export_documents()
-        except Exception as exc:  # pylint: disable=broad-except
+        self._sync_job = None
+        if not self._sync_dirty:
+            return
+        if self._sync_future is not None and not self._sync_future.done():
+            # 같은 파일을 동시에 쓰지 않도록 이전 내보내기가 끝난 뒤 다시 시도한다.
+            self._schedule_sync(self.SYNC_RETRY_MS)
+            return
+        self._sync_dirty = False
+        version = self.db.data_version
+        if version == self._synced_version:
+            return
+        self._synced_version = version
+        self._sync_future = self._executor.submit(self.sync_manager.export_documents)
+        self._poll_future(self._sync_future, self._on_sync_done)
+
+    def _on_sync_done(self, future: Future) -> None:
+        exc = future.exception()
+        if exc is not None:
+            self._synced_version = None
             messagebox.showwarning("문서 동기화", f"자동 저장 중 오류가 발생했습니다: {exc}")
 
     def _after_data_change(self) -> None:
         self.refresh_products()
         self.refresh_sales()
         self.refresh_dashboard()
-        self._auto_sync()
+        self._schedule_sync()
 
 
 def main() -> None:
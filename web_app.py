@@ -3,7 +3,7 @@
 기존 inventory_app.py의 DatabaseManager를 재사용하여 웹 인터페이스를 제공합니다.
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
 import os
 from inventory_app import DatabaseManager, ReportGenerator
 import datetime as dt
@@ -11,13 +11,21 @@ import matplotlib
 matplotlib.use('Agg')  # GUI 백엔드 대신 Agg 백엔드 사용
 import matplotlib.pyplot as plt
 import io
-import base64
+import hashlib
+import threading
+import atexit
+
+try:
+    import orjson  # 설치되어 있으면 JSON 직렬화를 C 구현으로 처리
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 app.secret_key = 'mow_secret_key_2024'
 
 # 기존 데이터베이스 매니저 재사용
 db = DatabaseManager()
+atexit.register(db.close)
 reporter = ReportGenerator(db)
 
 @app.route('/')
@@ -106,17 +114,22 @@ def update_taxes():
         flash(f'오류: {str(e)}', 'error')
     return redirect(url_for('taxes'))
 
+def json_rows(rows):
+    """sqlite3.Row 목록을 JSON 응답으로 돌려준다. orjson이 없으면 jsonify를 쓴다."""
+    data = [dict(row) for row in rows]
+    if orjson is None:
+        return jsonify(data)
+    return Response(orjson.dumps(data), mimetype='application/json')
+
 @app.route('/api/products')
 def api_products():
     """제품 목록 API"""
-    products = db.fetch_products()
-    return jsonify(products)
+    return json_rows(db.fetch_products())
 
 @app.route('/api/sales')
 def api_sales():
     """판매 데이터 API"""
-    sales = db.fetch_sales()
-    return jsonify(sales)
+    return json_rows(db.fetch_sales())
 
 @app.route('/generate_dummy_data')
 def generate_dummy_data():
@@ -135,46 +148,47 @@ def generate_dummy_data():
             db.add_product(*product)
 
         # 샘플 판매 기록 생성 (여러 달에 걸쳐)
+        # 행을 모두 모은 뒤 한 트랜잭션에서 executemany로 넣는다. 재고는 파이썬에서 따라가며 확인한다.
         import random
-        for month in range(12):  # 최근 12개월
-            for week in range(4):  # 매달 4주
-                # 각 주에 5-15개의 판매 기록 생성
-                num_sales = random.randint(5, 15)
-                for _ in range(num_sales):
-                    product_codes = ["P001", "P002", "P003", "P004", "P005"]
-                    code = random.choice(product_codes)
-                    quantity = random.randint(1, 3)
-
-                    # 과거 날짜로 판매 기록 생성
-                    sale_date = dt.date.today() - dt.timedelta(days=month*30 + week*7 + random.randint(0, 6))
-
-                    try:
-                        # 제품 정보 가져오기
-                        product = db.get_product(code)
-                        if product and product['stock'] >= quantity:
-                            # 직접 데이터베이스에 과거 날짜로 삽입
-                            conn = db._connect()
-                            cur = conn.cursor()
-
-                            # 재고 차감
-                            cur.execute("UPDATE products SET stock = stock - ? WHERE id = ?",
-                                      (quantity, product['id']))
-
-                            # 판매 기록 (과거 날짜)
-                            cur.execute("""
-                                INSERT INTO sales(product_id, quantity, sale_price, sale_date)
-                                VALUES (?, ?, ?, ?)
-                            """, (product['id'], quantity, product['price'], sale_date.isoformat()))
-
-                            # 현금 기록
-                            cur.execute("""
-                                INSERT INTO cash_movements(description, amount, movement_type, movement_date)
-                                VALUES (?, ?, ?, ?)
-                            """, (f"{product['name']} 판매 수익", product['price'] * quantity, "IN", sale_date.isoformat()))
-
-                            conn.commit()
-                    except Exception as e:
-                        pass  # 재고 부족 등은 무시
+        product_codes = [code for code, *_ in sample_products]
+        today = dt.date.today()
+        with db._tx() as cur:
+            placeholders = ", ".join("?" * len(product_codes))
+            cur.execute(f"SELECT * FROM products WHERE product_code IN ({placeholders})", product_codes)
+            products = {row['product_code']: row for row in cur.fetchall()}
+            stock = {code: row['stock'] for code, row in products.items()}
+
+            stock_updates = []
+            sales_rows = []
+            cash_rows = []
+            for month in range(12):  # 최근 12개월
+                for week in range(4):  # 매달 4주
+                    week_start = today - dt.timedelta(days=month*30 + week*7)
+                    # 각 주에 5-15개의 판매 기록 생성
+                    num_sales = random.randint(5, 15)
+                    for _ in range(num_sales):
+                        code = random.choice(product_codes)
+                        quantity = random.randint(1, 3)
+                        if stock[code] < quantity:
+                            continue  # 재고 부족은 건너뜀
+                        stock[code] -= quantity
+
+                        # 과거 날짜로 판매 기록 생성
+                        sale_date = (week_start - dt.timedelta(days=random.randint(0, 6))).isoformat()
+                        product = products[code]
+                        stock_updates.append((quantity, product['id']))
+                        sales_rows.append((product['id'], quantity, product['price'], sale_date))
+                        cash_rows.append((f"{product['name']} 판매 수익", product['price'] * quantity, "IN", sale_date))
+
+            cur.executemany("UPDATE products SET stock = stock - ? WHERE id = ?", stock_updates)
+            cur.executemany("""
+                INSERT INTO sales(product_id, quantity, sale_price, sale_date)
+                VALUES (?, ?, ?, ?)
+            """, sales_rows)
+            cur.executemany("""
+                INSERT INTO cash_movements(description, amount, movement_type, movement_date)
+                VALUES (?, ?, ?, ?)
+            """, cash_rows)
 
         flash('더미 데이터가 성공적으로 생성되었습니다!', 'success')
     except Exception as e:
@@ -182,14 +196,77 @@ def generate_dummy_data():
 
     return redirect(url_for('index'))
 
+# 그래프마다 같은 배경·축 설정은 시작할 때 한 번만 지정
+plt.rcParams.update({
+    'figure.facecolor': (0, 0, 0, 0),  # RGBA 투명
+    'axes.facecolor': (0, 0, 0, 0),
+    'axes.spines.top': False,
+    'axes.spines.right': False,
+})
+
+
+def _prewarm_matplotlib():
+    """폰트 캐시와 Agg 렌더러 초기화를 첫 /dashboard 요청 전에 끝내 둔다."""
+    try:
+        fig = plt.figure()
+        plt.plot([0, 1], [0, 1])
+        plt.savefig(io.BytesIO(), format='png')
+        plt.close(fig)
+    except Exception as e:
+        print(f"그래프 초기화 오류: {e}")
+
+
+_prewarm_matplotlib()
+
+# 대시보드 그래프 해상도. 150이면 래스터화할 픽셀이 2.25배가 되지만 화면에서는 차이가 거의 없다.
+CHART_DPI = 100
+
+# 데이터가 바뀌지 않았으면 matplotlib을 다시 돌리지 않는다: (data_version, 개월 수) -> (PNG 바이트, ETag)
+_chart_cache = {}
+# pyplot은 전역 상태를 쓰므로 그리기와 캐시 갱신은 한 번에 한 요청만 한다.
+_chart_lock = threading.Lock()
+
+def cached_chart_png(version):
+    """그래프 PNG와 그 내용 해시(ETag)를 돌려준다. 그래프를 만들 수 없으면 (None, None)."""
+    key = (version, 12)
+    with _chart_lock:
+        entry = _chart_cache.get(key)
+        if entry is None:
+            png = generate_chart()
+            if not png:
+                return None, None
+            # 서버를 다시 시작하면 data_version이 0부터 다시 세므로 ETag는 그림 내용으로 만든다.
+            entry = (png, hashlib.blake2b(png, digest_size=16).hexdigest())
+            _chart_cache.clear()
+            _chart_cache[key] = entry
+    return entry
+
 @app.route('/dashboard')
 def dashboard():
     """그래프 분석 대시보드"""
-    chart_url = generate_chart()
+    # 이미지는 /chart.png로 따로 받는다. 주소에 그림 해시를 넣어 내용이 바뀔 때만 브라우저가 새로 받는다.
+    _, etag = cached_chart_png(db.data_version)
+    chart_url = url_for('chart_png', v=etag) if etag else None
     return render_template('dashboard.html', chart_url=chart_url)
 
+@app.route('/chart.png')
+def chart_png():
+    """대시보드 그래프 PNG"""
+    version = db.data_version
+    # 이미 캐시된 그림과 ETag가 같으면 그리지 않고 바로 304를 돌려준다.
+    cached = _chart_cache.get((version, 12))
+    if cached and cached[1] in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{cached[1]}"'})
+    png, etag = cached_chart_png(version)
+    if not png:
+        return Response(status=404)
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    return Response(png, mimetype='image/png',
+                    headers={'ETag': f'"{etag}"', 'Cache-Control': 'max-age=3600'})
+
 def generate_chart():
-    """판매 추세 그래프 생성 - 입체적이고 투명한 디자인"""
+    """판매 추세 그래프 생성 - 입체적이고 투명한 디자인 (PNG 바이트 반환)"""
     try:
         # 최근 12개월 데이터 가져오기
         data = db.get_monthly_trends(12)
@@ -212,12 +289,8 @@ def generate_chart():
         vat = [row["vat"] for row in data]
         income_tax = [row["income_tax"] for row in data]
 
-        # 고해상도 그래프 생성
-        plt.figure(figsize=(14, 8), dpi=150)
-
-        # 완전 투명 배경 설정
-        plt.gcf().set_facecolor((0, 0, 0, 0))  # RGBA 투명
-        plt.gca().set_facecolor((0, 0, 0, 0))  # 투명
+        # 그래프 생성 (브라우저 화면에 맞춰 표시하므로 dpi 100이면 충분하다)
+        plt.figure(figsize=(14, 8), dpi=CHART_DPI)
 
         # 선 스타일링 - 더 부드럽고 입체적으로
         line_styles = [
@@ -236,16 +309,15 @@ def generate_chart():
         data_sets = [revenue, gross_profit, vat, income_tax]
 
         # 각 데이터셋에 대해 부드러운 선 그리기
-        for i, (data_set, style, label) in enumerate(zip(data_sets, line_styles, labels)):
+        for data_set, style, label in zip(data_sets, line_styles, labels):
             # 메인 선
             plt.plot(periods, data_set, label=label, zorder=3, **style)
 
-            # 데이터 포인트에 glow 효과 (작은 원으로)
-            for j, (x, y) in enumerate(zip(periods, data_set)):
-                # 외곽 glow
-                plt.scatter([x], [y], color=style['color'], alpha=0.2, s=150, zorder=1)
-                # 내부 포인트
-                plt.scatter([x], [y], color=style['color'], alpha=0.8, s=60, zorder=2)
+            # 데이터 포인트에 glow 효과 (점마다 따로 그리지 않고 선마다 한 번에)
+            # 외곽 glow
+            plt.scatter(periods, data_set, color=style['color'], alpha=0.2, s=150, zorder=1)
+            # 내부 포인트
+            plt.scatter(periods, data_set, color=style['color'], alpha=0.8, s=60, zorder=2)
 
         # 타이틀과 레이블 스타일링
         plt.title('최근 12개월 매출·이익·세금 추세', fontsize=20, fontweight='bold', pad=30,
@@ -269,23 +341,19 @@ def generate_chart():
         plt.xticks(rotation=45, ha='right', color='white', alpha=0.8, fontsize=11)
         plt.yticks(color='white', alpha=0.8, fontsize=11)
 
-        # 축 선 제거 (깔끔하게)
-        plt.gca().spines['top'].set_visible(False)
-        plt.gca().spines['right'].set_visible(False)
+        # 축 선 색 (위·오른쪽 축 선은 rcParams에서 제거)
         plt.gca().spines['left'].set_color('rgba(255, 255, 255, 0.3)')
         plt.gca().spines['bottom'].set_color('rgba(255, 255, 255, 0.3)')
 
         # 여백 조정
         plt.tight_layout(pad=3.0)
 
-        # 고해상도로 저장
+        # 저장
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', transparent=True)
-        buf.seek(0)
-        chart_data = base64.b64encode(buf.getvalue()).decode('utf-8')
+        plt.savefig(buf, format='png', dpi=CHART_DPI, bbox_inches='tight', transparent=True)
         plt.close()
 
-        return f'data:image/png;base64,{chart_data}'
+        return buf.getvalue()
 
     except Exception as e:
         print(f"그래프 생성 오류: {e}")